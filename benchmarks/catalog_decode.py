@@ -0,0 +1,96 @@
+"""Per-catalog decode cost of the upstream /tickers/ payload
+
+Run with ``python -m benchmarks.catalog_decode [--size N] [--rounds N]``.
+"""
+
+import argparse
+import json
+import time
+from typing import Callable
+
+import orjson
+
+from src.api.schemas.currency import CurrencyInfo
+from src.services.catalog import TickerCatalog, parse_catalog_entries
+
+
+def make_payload(size: int) -> bytes:
+    data = [
+        {
+            "id": str(90 + i),
+            "symbol": f"C{i}",
+            "name": f"Coin {i}",
+            "nameid": f"coin-{i}",
+            "rank": i + 1,
+            "price_usd": f"{1000 / (i + 1):.8f}",
+            "percent_change_24h": "-0.53",
+            "percent_change_1h": "0.12",
+            "percent_change_7d": "4.20",
+            "market_cap_usd": "1175186744.84",
+            "volume24": "30468935.11",
+            "volume24_native": "30468935.11",
+            "csupply": "1000000.00",
+            "tsupply": "1000000",
+            "msupply": "",
+        }
+        for i in range(size)
+    ]
+    return json.dumps({"data": data, "info": {"coins_num": size}}).encode()
+
+
+def decode_before(payload: bytes) -> list[CurrencyInfo]:
+    # stdlib decode and a validated model per asset on every call
+    data = json.loads(payload)["data"]
+    return [
+        CurrencyInfo(symbol=currency["symbol"], name=currency["name"])
+        for currency in data
+    ]
+
+
+def decode_after(payload: bytes) -> TickerCatalog:
+    # orjson decode straight into the catalog tuples, no models
+    data = orjson.loads(payload)["data"]
+    return TickerCatalog(parse_catalog_entries([data]))
+
+
+def currency_list(catalog: TickerCatalog) -> list[CurrencyInfo]:
+    return [
+        CurrencyInfo(symbol=entry.symbol, name=entry.name)
+        for entry in catalog.entries
+    ]
+
+
+def measure(func: Callable[[], object], rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = make_payload(args.size)
+    catalog = decode_after(payload)
+    cached = {catalog.version: currency_list(catalog)}
+
+    before = measure(lambda: decode_before(payload), args.rounds)
+    decode = measure(lambda: decode_after(payload), args.rounds)
+    models = measure(lambda: currency_list(catalog), args.rounds)
+    hit = measure(lambda: cached[catalog.version], args.rounds)
+
+    print(f"catalog of {args.size} tickers, {len(payload)} bytes")
+    print(f"before, per call:            {before:10.3f} ms")
+    print(f"after, decode per version:   {decode:10.3f} ms")
+    print(f"after, models per version:   {models:10.3f} ms")
+    print(f"after, per call:             {hit:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Local Coinlore-compatible ticker API for load tests
+
+Run with ``python -m benchmarks.fake_upstream [--port 9000]
+[--catalog-size N] [--latency S] [--jitter S]`` and point the service at
+it with ``CURRENCY_API_URL=http://127.0.0.1:9000/api``.
+``GET /stats`` returns the number of calls per endpoint.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI, Query
+
+
+def make_tickers(size: int) -> list[dict]:
+    return [
+        {
+            "id": str(90 + i),
+            "symbol": f"C{i}",
+            "name": f"Coin {i}",
+            "nameid": f"coin-{i}",
+            "rank": i + 1,
+            "base_price": 1000 / (i + 1),
+        }
+        for i in range(size)
+    ]
+
+
+def create_app(catalog_size: int, latency: float, jitter: float) -> FastAPI:
+    app = FastAPI(title="Fake ticker API")
+    tickers = make_tickers(catalog_size)
+    by_id = {ticker["id"]: ticker for ticker in tickers}
+    calls: Counter[str] = Counter()
+
+    async def delay() -> None:
+        seconds = random.uniform(latency - jitter, latency + jitter)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def render(ticker: dict) -> dict:
+        # prices drift slowly so every refresh sees some changes
+        drift = 1 + 0.01 * math.sin(time.time() / 60 + ticker["rank"])
+        return {
+            "id": ticker["id"],
+            "symbol": ticker["symbol"],
+            "name": ticker["name"],
+            "nameid": ticker["nameid"],
+            "rank": ticker["rank"],
+            "price_usd": f"{ticker['base_price'] * drift:.8f}",
+        }
+
+    @app.get("/api/tickers/")
+    async def get_tickers(start: int = 0, limit: int = 100) -> dict:
+        calls["tickers"] += 1
+        await delay()
+        return {
+            "data": [render(t) for t in tickers[start : start + limit]],
+            "info": {"coins_num": len(tickers), "time": int(time.time())},
+        }
+
+    @app.get("/api/ticker/")
+    async def get_ticker(id: str = Query(default="")) -> list[dict]:
+        calls["ticker"] += 1
+        await delay()
+        return [
+            render(by_id[ticker_id])
+            for ticker_id in id.split(",")
+            if ticker_id in by_id
+        ]
+
+    @app.get("/stats")
+    async def get_stats() -> dict[str, int]:
+        return dict(calls)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--catalog-size", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    args = parser.parse_args()
+
+    app = create_app(args.catalog_size, args.latency, args.jitter)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Open-loop load generator for a running service
+
+Run with ``python -m benchmarks.load --base-url http://127.0.0.1:8000
+--upstream-url http://127.0.0.1:9000 --rps 100 --duration 30``. Requests
+are started on a fixed schedule whatever the response times are, and the
+report is printed as JSON with latency percentiles, error rates and the
+upstream calls made during the run.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from collections import defaultdict
+
+import httpx
+
+PASSWORD = "_LoadTest1234!"
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    rank = max(
+        0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], errors: int) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+    }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight or 1)
+    unknown = set(weights) - {"login", "list", "convert"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown operations: {unknown}")
+    return weights
+
+
+class LoadRun:
+    def __init__(self, client: httpx.AsyncClient, username: str):
+        self.client = client
+        self.username = username
+        self.headers: dict[str, str] = {}
+        self.symbols: list[str] = []
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.operations = {
+            "login": self._login,
+            "list": self._list,
+            "convert": self._convert,
+        }
+
+    async def prepare(self) -> None:
+        response = await self.client.post(
+            "/api/user/register",
+            json={
+                "email": f"{self.username}@example.com",
+                "username": self.username,
+                "password": PASSWORD,
+            },
+        )
+        if response.status_code not in (201, 409):
+            response.raise_for_status()
+
+        response = await self._login()
+        response.raise_for_status()
+        self.headers = {
+            "X-Device-ID": "load-test",
+            "Authorization": f"Bearer {response.json()['access_token']}",
+        }
+
+        response = await self.client.get(
+            "/api/currency/list", headers=self.headers
+        )
+        response.raise_for_status()
+        currencies = response.json()["currencies"]
+        self.symbols = [currency["symbol"] for currency in currencies[:50]]
+
+    async def _list(self) -> httpx.Response:
+        return await self.client.get(
+            "/api/currency/list", headers=self.headers
+        )
+
+    async def _convert(self) -> httpx.Response:
+        from_symbol, *to_symbols = random.sample(self.symbols, 4)
+        return await self.client.post(
+            "/api/currency/convert",
+            headers=self.headers,
+            json={
+                "from_symbol": from_symbol,
+                "to_symbols": to_symbols,
+                "amount": 1,
+            },
+        )
+
+    async def execute(self, operation: str) -> None:
+        started_at = time.perf_counter()
+        try:
+            response = await self.operations[operation]()
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        self.latencies[operation].append(time.perf_counter() - started_at)
+        if failed:
+            self.errors[operation] += 1
+
+    async def _login(self) -> httpx.Response:
+        return await self.client.post(
+            "/api/auth/login",
+            json={"username": self.username, "password": PASSWORD},
+            headers={"X-Device-ID": "load-test"},
+        )
+
+
+async def upstream_calls(upstream_url: str | None) -> dict[str, int]:
+    if not upstream_url:
+        return {}
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{upstream_url}/stats")
+        response.raise_for_status()
+        return response.json()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.max_in_flight)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        load = LoadRun(client, args.username)
+        await load.prepare()
+        upstream_before = await upstream_calls(args.upstream_url)
+
+        operations = list(args.mix)
+        weights = list(args.mix.values())
+        interval = 1 / args.rps
+        total = int(args.rps * args.duration)
+        tasks: set[asyncio.Task] = set()
+        dropped = 0
+
+        started_at = time.perf_counter()
+        for i in range(total):
+            delay = started_at + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= args.max_in_flight:
+                # the service is too slow for the schedule
+                dropped += 1
+                continue
+
+            operation = random.choices(operations, weights)[0]
+            task = asyncio.ensure_future(load.execute(operation))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started_at
+        upstream_after = await upstream_calls(args.upstream_url)
+
+    all_latencies = [
+        latency
+        for latencies in load.latencies.values()
+        for latency in latencies
+    ]
+    sent = len(all_latencies)
+    return {
+        "config": {
+            "base_url": args.base_url,
+            "rps": args.rps,
+            "duration": args.duration,
+            "mix": args.mix,
+            "max_in_flight": args.max_in_flight,
+        },
+        "elapsed": round(elapsed, 3),
+        "achieved_rps": round(sent / elapsed, 2),
+        "dropped": dropped,
+        "overall": summarize(all_latencies, sum(load.errors.values())),
+        "endpoints": {
+            operation: summarize(latencies, load.errors[operation])
+            for operation, latencies in sorted(load.latencies.items())
+        },
+        "upstream_calls": {
+            name: count - upstream_before.get(name, 0)
+            for name, count in upstream_after.items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--upstream-url", default=None)
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument(
+        "--mix", type=parse_mix, default="login=1,list=4,convert=15"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--username",
+        default="load" + "".join(random.choices(string.ascii_lowercase, k=8)),
+        help="Letters only, registered on the first run",
+    )
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(rendered + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Microbenchmarks of the functions on the request path, no network
+
+Run with ``python -m benchmarks.micro [--filter NAME] [--output FILE]
+[--compare FILE]``. Each benchmark reports operations per second and the
+peak memory allocated by one call, ``--compare`` flags the ones slower
+than a previous result file.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from src.api.middleware.handlers import custom_request_validation_handler
+from src.api.schemas.currency import ConvertRatesResponse, ConvertRequest
+from src.api.schemas.user import UserReturnSchema
+from src.core.security import JwtAuth, TokenTypeEnum
+from src.services.converter import ConverterService
+from src.services.rates import RateSnapshot
+from src.utils.password import PasswordHasher
+
+BENCHMARKS: dict[str, Callable[[], Any]] = {}
+
+
+def benchmark(name: str):
+    def register(func: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+@benchmark("converter.convert_currency")
+def bench_convert_currency():
+    prices = {f"C{i}": 1000 / (i + 1) for i in range(2000)}
+    prices.update({"BTC": 60000.0, "ETH": 3000.0, "USDT": 1.0})
+    snapshot = RateSnapshot.from_prices(1, prices)
+    service = ConverterService(None)
+
+    async def run():
+        return await service.convert_currency(
+            "ETH", ["BTC", "USDT", "C10"], 1.5, snapshot
+        )
+
+    return run
+
+
+@benchmark("jwt.create_token")
+def bench_create_token():
+    payload = JwtAuth.create_payload(
+        {"sub": "test@example.com", "device_id": "device"},
+        TokenTypeEnum.ACCESS,
+    )
+    return lambda: JwtAuth.create_token(payload)
+
+
+@benchmark("jwt.decode_token")
+def bench_decode_token():
+    token = JwtAuth.create_token(
+        JwtAuth.create_payload(
+            {"sub": "test@example.com", "device_id": "device"},
+            TokenTypeEnum.ACCESS,
+        )
+    )
+    return lambda: JwtAuth.decode_token(token, verify_exp=True)
+
+
+@benchmark("password.hash")
+def bench_password_hash():
+    return lambda: PasswordHasher.hash("_TestPassword87!")
+
+
+@benchmark("password.verify")
+def bench_password_verify():
+    hashed = PasswordHasher.hash("_TestPassword87!")
+    return lambda: PasswordHasher.verify("_TestPassword87!", hashed)
+
+
+@benchmark("schema.ConvertRequest")
+def bench_convert_request():
+    data = {"from_symbol": "ETH", "amount": 1.5, "to_symbols": ["BTC", "USDT"]}
+    return lambda: ConvertRequest.model_validate(data)
+
+
+@benchmark("schema.ConvertRatesResponse")
+def bench_convert_rates_response():
+    data = {
+        "from_symbol": "ETH",
+        "amount": 1.5,
+        "rates": {"BTC": 0.05437932, "USDT": 4500.12, "DOGE": 17680.02},
+        "snapshot_age": 4.2,
+    }
+    return lambda: ConvertRatesResponse.model_validate(data)
+
+
+@benchmark("schema.UserReturnSchema")
+def bench_user_return_schema():
+    data = {
+        "id": "123e4567-e89b-12d3-a456-426614174000",
+        "email": "test@example.com",
+        "username": "testuser",
+        "first_name": "John",
+        "last_name": None,
+    }
+    return lambda: UserReturnSchema.model_validate(data)
+
+
+@benchmark("handlers.custom_request_validation_handler")
+def bench_validation_handler():
+    try:
+        ConvertRequest.model_validate({"amount": -1, "to_symbols": "BTC"})
+    except ValidationError as e:
+        error = RequestValidationError(e.errors())
+    request = Request({"type": "http", "method": "POST", "headers": []})
+
+    async def run():
+        return await custom_request_validation_handler(request, error)
+
+    return run
+
+
+def measure(func: Callable[[], Any], min_time: float, repeat: int) -> dict:
+    if inspect.iscoroutinefunction(func):
+        loop = asyncio.new_event_loop()
+
+        def call_n(n: int) -> None:
+            async def calls():
+                for _ in range(n):
+                    await func()
+
+            loop.run_until_complete(calls())
+
+    else:
+        loop = None
+
+        def call_n(n: int) -> None:
+            for _ in range(n):
+                func()
+
+    try:
+        # grow the batch until one batch takes min_time
+        number = 1
+        while True:
+            started_at = time.perf_counter()
+            call_n(number)
+            elapsed = time.perf_counter() - started_at
+            if elapsed >= min_time or number >= 1 << 24:
+                break
+            number *= 10 if elapsed < min_time / 10 else 2
+
+        rates = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            call_n(number)
+            rates.append(number / (time.perf_counter() - started_at))
+
+        tracemalloc.start()
+        try:
+            allocations = []
+            for _ in range(5):
+                baseline = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                call_n(1)
+                allocations.append(
+                    tracemalloc.get_traced_memory()[1] - baseline
+                )
+        finally:
+            tracemalloc.stop()
+    finally:
+        if loop is not None:
+            loop.close()
+
+    return {
+        "ops_per_sec": round(statistics.median(rates), 2),
+        "peak_alloc_bytes": int(statistics.median(allocations)),
+        "calls_per_round": number,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    regressed = False
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+
+        ratio = result["ops_per_sec"] / previous["ops_per_sec"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  REGRESSION"
+            regressed = True
+        print(
+            f"{name:45} {ratio:6.2f}x ops/sec, "
+            f"{result['peak_alloc_bytes'] - previous['peak_alloc_bytes']:+8d}"
+            f" bytes{flag}"
+        )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+
+        results[name] = measure(setup(), args.min_time, args.repeat)
+        print(
+            f"{name:45} {results[name]['ops_per_sec']:14.2f} ops/sec "
+            f"{results[name]['peak_alloc_bytes']:10d} bytes/call"
+        )
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["benchmarks"]
+        if compare(results, baseline, args.tolerance):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
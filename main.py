@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
@@ -7,24 +9,135 @@ from src.api.endpoints.converter import router as converter_router
 from src.api.endpoints.user import router as user_router
 from src.api.middleware.handlers import (
     auth_exception_handler,
+    converter_exception_handler,
     currency_exception_handler,
     custom_request_validation_handler,
     token_exception_handler,
     user_exception_handler,
 )
+from src.core.config import (
+    cache_settings,
+    currency_api_settings,
+    jwt_settings,
+)
+from src.core.http import create_http_client
+from src.core.security import VerifiedTokenCache
+from src.db.database import async_session_maker, engine
 from src.exceptions.routers import CurrencyRouterException
 from src.exceptions.services import (
     AuthServiceException,
+    ConverterServiceException,
     TokenServiceException,
     UserServiceException,
 )
+from src.services.auth import RefreshTokenIndex
+from src.services.converter import ConverterService
+from src.services.rates import RateHistory, RateRefresher, SnapshotRecorder
+from src.services.shared_rates import SharedRateSync
+from src.services.stream import RateBroadcaster
+from src.services.user import USER_CODEC
+from src.utils.cache import TieredCache
+from src.utils.cache_backends import create_cache_backend
+from src.utils.password import PasswordHasher
+from src.utils.unit_of_work import UnitOfWork
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # tests put their own session maker on app.state before startup
+    app.state.session_maker = getattr(
+        app.state, "session_maker", async_session_maker
+    )
+    app.state.http_client = create_http_client()
+    app.state.cache = TieredCache(
+        create_cache_backend(
+            cache_settings.BACKEND_URL,
+            pool_size=cache_settings.BACKEND_POOL_SIZE,
+            timeout=cache_settings.BACKEND_TIMEOUT,
+        )
+    )
+    app.state.user_cache = app.state.cache.namespace(
+        "users",
+        ttl=cache_settings.USER_TTL,
+        maxsize=cache_settings.USER_MAX_SIZE,
+        codec=USER_CODEC,
+    )
+    app.state.token_cache = VerifiedTokenCache(
+        jwt_settings.VERIFIED_CACHE_SIZE
+    )
+    app.state.refresh_tokens = RefreshTokenIndex()
+    await app.state.refresh_tokens.load(UnitOfWork(app.state.session_maker))
+    app.state.converter_service = ConverterService(
+        app.state.http_client,
+        rate_history=RateHistory(
+            app.state.session_maker,
+            cache_size=currency_api_settings.HISTORY_CACHE_SIZE,
+        ),
+        cache=app.state.cache,
+    )
+    app.state.rate_broadcaster = RateBroadcaster(
+        buffer_size=currency_api_settings.STREAM_BUFFER_SIZE
+    )
+    app.state.converter_service.rate_table.add_listener(
+        app.state.rate_broadcaster.publish
+    )
+    app.state.snapshot_recorder = SnapshotRecorder(
+        UnitOfWork(app.state.session_maker),
+        queue_size=currency_api_settings.SNAPSHOT_QUEUE_SIZE,
+    )
+    app.state.rate_refresher = RateRefresher(
+        app.state.converter_service,
+        interval=currency_api_settings.RATES_REFRESH_INTERVAL,
+    )
+    app.state.shared_rates = None
+    if (
+        currency_api_settings.RATES_REFRESH_ENABLED
+        and currency_api_settings.RATES_SHARED_MEMORY
+    ):
+        app.state.shared_rates = SharedRateSync(
+            currency_api_settings.RATES_SHARED_MEMORY,
+            capacity=currency_api_settings.RATES_SHARED_CAPACITY,
+            rate_table=app.state.converter_service.rate_table,
+            refresher=app.state.rate_refresher,
+            poll_interval=currency_api_settings.RATES_SHARED_POLL_INTERVAL,
+        )
+    if currency_api_settings.SNAPSHOT_PERSIST:
+        # only the worker that fetched a snapshot persists it
+        if app.state.shared_rates is not None:
+            app.state.shared_rates.add_listener(
+                app.state.snapshot_recorder.submit
+            )
+        else:
+            app.state.converter_service.rate_table.add_listener(
+                app.state.snapshot_recorder.submit, adopted=False
+            )
+        app.state.snapshot_recorder.start()
+    if app.state.shared_rates is not None:
+        app.state.shared_rates.start()
+    elif currency_api_settings.RATES_REFRESH_ENABLED:
+        app.state.rate_refresher.start()
+    yield
+    app.state.rate_broadcaster.close()
+    await app.state.rate_refresher.stop()
+    if app.state.shared_rates is not None:
+        await app.state.shared_rates.stop()
+    await app.state.snapshot_recorder.stop()
+    await app.state.converter_service.close()
+    await app.state.cache.close()
+    await app.state.http_client.aclose()
+    await engine.dispose()
+    PasswordHasher.shutdown()
 
-app = FastAPI(title="API CryptoCurrency Converter")
+
+app = FastAPI(title="API CryptoCurrency Converter", lifespan=lifespan)
 
 app.add_exception_handler(AuthServiceException, auth_exception_handler)
 app.add_exception_handler(TokenServiceException, token_exception_handler)
 app.add_exception_handler(UserServiceException, user_exception_handler)
 app.add_exception_handler(CurrencyRouterException, currency_exception_handler)
+app.add_exception_handler(
+    ConverterServiceException, converter_exception_handler
+)
 app.add_exception_handler(
     RequestValidationError, custom_request_validation_handler
 )
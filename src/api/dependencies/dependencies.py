@@ -1,26 +1,25 @@
 from typing import Annotated
 
-from fastapi import Depends, Security
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from fastapi import Depends, Request, Security
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from src.api.schemas.currency import CurrencyListResponse
 from src.api.schemas.user import UserReturnSchema
-from src.core.config import db_settings
 from src.core.security import TokenTypeEnum, access_token_header
 from src.exceptions.services import (
     UserNotFoundException,
     WrongAuthorizationHeaderException,
 )
 from src.services.auth import AuthService
+from src.services.catalog import TickerCatalog
 from src.services.converter import ConverterService
+from src.services.stream import RateBroadcaster
 from src.services.user import UserService
+from src.utils.prerendered import PreRenderedJSON
 from src.utils.unit_of_work import IUnitOfWork, UnitOfWork
 
 
-async def get_session_maker():
-    engine = create_async_engine(db_settings.DATABASE_URL)
-    async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
-    return async_session_maker
+async def get_session_maker(request: Request) -> async_sessionmaker:
+    return request.app.state.session_maker
 
 
 async def get_unit_of_work(
@@ -30,19 +29,29 @@ async def get_unit_of_work(
 
 
 async def get_auth_service(
+    request: Request,
     uow: IUnitOfWork = Depends(get_unit_of_work),
 ) -> AuthService:
-    return AuthService(uow)
+    return AuthService(
+        uow, request.app.state.token_cache, request.app.state.refresh_tokens
+    )
 
 
 async def get_user_service(
+    request: Request,
     uow: IUnitOfWork = Depends(get_unit_of_work),
 ) -> UserService:
-    return UserService(uow)
+    return UserService(
+        uow, request.app.state.user_cache, request.app.state.token_cache
+    )
+
+
+async def get_convert_service(request: Request) -> ConverterService:
+    return request.app.state.converter_service
 
 
-async def get_convert_service() -> ConverterService:
-    return ConverterService()
+async def get_rate_broadcaster(request: Request) -> RateBroadcaster:
+    return request.app.state.rate_broadcaster
 
 
 async def validate_access_token(
@@ -85,6 +94,12 @@ async def get_current_user(
 async def get_available_currencies(
     current_user: Annotated[UserReturnSchema, Depends(get_current_user)],
     convert_service: Annotated[ConverterService, Depends(get_convert_service)],
-) -> CurrencyListResponse:
-    currencies = await convert_service.get_available_symbols()
-    return CurrencyListResponse(currencies=currencies)
+) -> PreRenderedJSON:
+    return await convert_service.get_currency_list()
+
+
+async def get_ticker_catalog(
+    current_user: Annotated[UserReturnSchema, Depends(get_current_user)],
+    convert_service: Annotated[ConverterService, Depends(get_convert_service)],
+) -> TickerCatalog:
+    return await convert_service.get_catalog()
@@ -1,68 +1,351 @@
-from typing import Annotated
+from typing import Annotated, AsyncIterator, List
 
-from fastapi import APIRouter, Body, Depends, status
+import orjson
+from fastapi import APIRouter, Body, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from src.api.dependencies.dependencies import (
     get_available_currencies,
     get_convert_service,
+    get_current_user,
+    get_rate_broadcaster,
+    get_ticker_catalog,
 )
 from src.api.schemas.currency import (
+    CacheStatus,
+    ConvertBatchItemResult,
+    ConvertBatchResponse,
     ConvertRatesResponse,
     ConvertRequest,
+    CrossRatesResponse,
     CurrencyListResponse,
+    ProviderStatus,
+    ProviderStatusResponse,
 )
-from src.exceptions.routers import InvalidSymbolException
+from src.api.schemas.user import UserReturnSchema
+from src.core.config import currency_api_settings
+from src.exceptions.routers import (
+    BatchTooLargeException,
+    InvalidSymbolException,
+)
+from src.exceptions.services import (
+    HistoricalRatesNotFoundException,
+    RatesUnavailableException,
+)
+from src.services.catalog import TickerCatalog
 from src.services.converter import ConverterService
+from src.services.rates import RateSnapshot
+from src.services.stream import RateBroadcaster, RateSubscription
+from src.utils.prerendered import PreRenderedJSON
 
 router = APIRouter()
 
 
+async def _get_snapshot(
+    convert: ConvertRequest, convert_service: ConverterService
+) -> RateSnapshot:
+    if convert.at is not None:
+        return await convert_service.get_historical_rates(convert.at)
+    return await convert_service.get_rates(
+        [convert.from_symbol, *convert.to_symbols]
+    )
+
+
+def _resolve_symbols(
+    convert: ConvertRequest, catalog: TickerCatalog
+) -> ConvertRequest:
+    from_entry = catalog.resolve(convert.from_symbol)
+    if from_entry is None:
+        raise InvalidSymbolException(
+            f"Invalid 'from' symbol: '{convert.from_symbol}'"
+        )
+
+    to_entries = [catalog.resolve(symbol) for symbol in convert.to_symbols]
+    invalid_to_symbols = [
+        symbol
+        for symbol, entry in zip(convert.to_symbols, to_entries)
+        if entry is None
+    ]
+    if invalid_to_symbols:
+        raise InvalidSymbolException(
+            f"Invalid 'to' currencies: {invalid_to_symbols}, "
+            "check the available symbols"
+        )
+
+    return convert.model_copy(
+        update={
+            "from_symbol": from_entry.symbol,
+            "to_symbols": [entry.symbol for entry in to_entries],
+        }
+    )
+
+
+def _resolve_symbol_list(
+    symbols: str, catalog: TickerCatalog, max_symbols: int
+) -> List[str]:
+    requested = [symbol.strip() for symbol in symbols.split(",")]
+    requested = [symbol for symbol in requested if symbol]
+    if not requested:
+        raise InvalidSymbolException("No symbols provided")
+
+    if len(requested) > max_symbols:
+        raise InvalidSymbolException(
+            f"Too many symbols: {len(requested)}, the limit is {max_symbols}"
+        )
+
+    entries = [catalog.resolve(symbol) for symbol in requested]
+    invalid_symbols = [
+        symbol for symbol, entry in zip(requested, entries) if entry is None
+    ]
+    if invalid_symbols:
+        raise InvalidSymbolException(
+            f"Invalid currencies: {invalid_symbols}, "
+            "check the available symbols"
+        )
+
+    return list(dict.fromkeys(entry.symbol for entry in entries))
+
+
+async def _stream_events(
+    subscription: RateSubscription, broadcaster: RateBroadcaster
+) -> AsyncIterator[bytes]:
+    heartbeat = currency_api_settings.STREAM_HEARTBEAT_INTERVAL
+    # a client disconnect cancels the generator, which unsubscribes it
+    try:
+        while True:
+            update = await subscription.get(timeout=heartbeat)
+            if subscription.closed:
+                break
+            if update is None:
+                yield b": ping\n\n"
+                continue
+
+            data = orjson.dumps(update._asdict())
+            yield b"event: rates\nid: %d\ndata: %s\n\n" % (
+                update.version,
+                data,
+            )
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
 @router.get(
     path="/list",
     description="Get list of available currencies like symbols and names",
+    response_model=CurrencyListResponse,
     responses={
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The list matches the If-None-Match ETag"
+        },
         status.HTTP_401_UNAUTHORIZED: {"description": "Invalid token"},
     },
 )
 async def get_currency_rates(
-    currency_list=Depends(get_available_currencies),
-) -> CurrencyListResponse:
-    return currency_list
+    request: Request,
+    currency_list: PreRenderedJSON = Depends(get_available_currencies),
+) -> Response:
+    return currency_list.to_response(request)
 
 
 @router.post(
     path="/convert",
-    description="Convert currency from one to many",
+    description="Convert currency from one to many, optionally at a past time",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "No rates recorded for the requested time"
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Currency rates are unavailable"
+        },
+    },
 )
 async def convert(
     convert: Annotated[ConvertRequest, Body()],
-    currency_list: CurrencyListResponse = Depends(get_available_currencies),
+    catalog: TickerCatalog = Depends(get_ticker_catalog),
     convert_service: ConverterService = Depends(get_convert_service),
 ) -> ConvertRatesResponse:
-    available_symbols = [
-        currency.symbol for currency in currency_list.currencies
-    ]
-    if convert.from_symbol not in available_symbols:
-        raise InvalidSymbolException(
-            f"Invalid 'from' symbol: '{convert.from_symbol}'"
-        )
-
-    invalid_to_symbols = [
-        symbol
-        for symbol in convert.to_symbols
-        if symbol not in available_symbols
-    ]
-    if invalid_to_symbols:
-        raise InvalidSymbolException(
-            f"Invalid 'to' currencies: {invalid_to_symbols}, "
-            "check the available symbols"
-        )
+    convert = _resolve_symbols(convert, catalog)
 
+    snapshot = await _get_snapshot(convert, convert_service)
     rates = await convert_service.convert_currency(
         from_symbol=convert.from_symbol,
         to_symbols=convert.to_symbols,
         amount=convert.amount,
+        snapshot=snapshot,
     )
     return ConvertRatesResponse(
-        from_symbol=convert.from_symbol, amount=convert.amount, rates=rates
+        from_symbol=convert.from_symbol,
+        amount=convert.amount,
+        rates=rates,
+        snapshot_age=snapshot.age,
+    )
+
+
+@router.post(
+    path="/convert/batch",
+    description="Convert many currency requests in one call, results "
+    "keep the input order",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Invalid token"},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {
+            "description": "Too many items in the batch"
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Currency rates are unavailable"
+        },
+    },
+)
+async def convert_batch(
+    items: Annotated[List[ConvertRequest], Body()],
+    catalog: TickerCatalog = Depends(get_ticker_catalog),
+    convert_service: ConverterService = Depends(get_convert_service),
+) -> ConvertBatchResponse:
+    max_size = currency_api_settings.BATCH_MAX_SIZE
+    if len(items) > max_size:
+        raise BatchTooLargeException(
+            f"Too many items: {len(items)}, the limit is {max_size}"
+        )
+
+    live_symbols = [
+        symbol
+        for item in items
+        if item.at is None
+        for symbol in (item.from_symbol, *item.to_symbols)
+    ]
+    # a purely historical batch does not need the live rates
+    live_snapshot = None
+    if live_symbols:
+        live_snapshot = await convert_service.get_rates(live_symbols)
+
+    results = []
+    for item in items:
+        try:
+            item = _resolve_symbols(item, catalog)
+            snapshot = (
+                live_snapshot
+                if item.at is None
+                else await convert_service.get_historical_rates(item.at)
+            )
+            rates = await convert_service.convert_currency(
+                from_symbol=item.from_symbol,
+                to_symbols=item.to_symbols,
+                amount=item.amount,
+                snapshot=snapshot,
+            )
+        except (
+            InvalidSymbolException,
+            RatesUnavailableException,
+            HistoricalRatesNotFoundException,
+        ) as e:
+            results.append(ConvertBatchItemResult(error=e.message))
+            continue
+
+        results.append(
+            ConvertBatchItemResult(
+                result=ConvertRatesResponse(
+                    from_symbol=item.from_symbol,
+                    amount=item.amount,
+                    rates=rates,
+                    snapshot_age=snapshot.age,
+                )
+            )
+        )
+    return ConvertBatchResponse(items=results)
+
+
+@router.get(
+    path="/matrix",
+    description="Get cross rates between every pair of the given currencies",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid symbols"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Invalid token"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Currency rates are unavailable"
+        },
+    },
+)
+async def get_cross_rate_matrix(
+    symbols: str = Query(
+        description="Comma-separated currency symbols", examples=["ETH,BTC"]
+    ),
+    catalog: TickerCatalog = Depends(get_ticker_catalog),
+    convert_service: ConverterService = Depends(get_convert_service),
+) -> CrossRatesResponse:
+    requested = _resolve_symbol_list(
+        symbols, catalog, currency_api_settings.MATRIX_MAX_SYMBOLS
+    )
+    snapshot = await convert_service.get_rates(requested)
+    matrix = await convert_service.get_cross_rates(requested, snapshot)
+    return CrossRatesResponse(
+        symbols=requested, matrix=matrix, snapshot_age=snapshot.age
+    )
+
+
+@router.get(
+    path="/status",
+    description="Get the currency providers circuit breakers and rates state",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Invalid token"},
+    },
+)
+async def get_provider_status(
+    current_user: Annotated[UserReturnSchema, Depends(get_current_user)],
+    convert_service: ConverterService = Depends(get_convert_service),
+) -> ProviderStatusResponse:
+    snapshot = convert_service.rate_table.snapshot
+    return ProviderStatusResponse(
+        providers=[
+            ProviderStatus(
+                name=slot.provider.name,
+                breaker_state=slot.breaker.state.value,
+                consecutive_failures=slot.breaker.failures,
+                retry_after=slot.breaker.retry_after,
+                hedge_delay=slot.hedge_delay,
+            )
+            for slot in convert_service.providers.slots
+        ],
+        snapshot_version=snapshot.version if snapshot else None,
+        snapshot_age=snapshot.age if snapshot else None,
+        pair_cache_size=len(convert_service.pair_rates),
+        pair_cache_hit_ratio=convert_service.pair_rates.hit_ratio,
+        caches=[
+            CacheStatus(
+                name=namespace.name,
+                size=len(namespace),
+                hits=namespace.hits,
+                backend_hits=namespace.backend_hits,
+                misses=namespace.misses,
+                hit_ratio=namespace.hit_ratio,
+            )
+            for namespace in convert_service.cache.namespaces.values()
+        ],
+    )
+
+
+@router.get(
+    path="/stream",
+    description="Server-sent events with the USD prices of the given "
+    "currencies, first all of them, then only the changed ones",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"text/event-stream": {}}},
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid symbols"},
+        status.HTTP_401_UNAUTHORIZED: {"description": "Invalid token"},
+    },
+)
+async def stream_rates(
+    symbols: str = Query(
+        description="Comma-separated currency symbols", examples=["ETH,BTC"]
+    ),
+    catalog: TickerCatalog = Depends(get_ticker_catalog),
+    broadcaster: RateBroadcaster = Depends(get_rate_broadcaster),
+) -> StreamingResponse:
+    requested = _resolve_symbol_list(
+        symbols, catalog, currency_api_settings.STREAM_MAX_SYMBOLS
+    )
+    subscription = broadcaster.subscribe(requested)
+    return StreamingResponse(
+        _stream_events(subscription, broadcaster),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -7,12 +7,16 @@ from src.api.schemas._common import (
     ValidationErrorResponse,
 )
 from src.exceptions.routers import (
+    BatchTooLargeException,
     CurrencyRouterException,
     InvalidSymbolException,
 )
 from src.exceptions.services import (
     AuthServiceException,
+    ConverterServiceException,
+    HistoricalRatesNotFoundException,
     NoHeaderException,
+    PasswordHasherBusyException,
     TokenServiceException,
     UserAlreadyExistsException,
     UserNotAuthorizedException,
@@ -25,11 +29,16 @@ from src.exceptions.services import (
 async def auth_exception_handler(request: Request, exc: AuthServiceException):
     exc_codes = {
         NoHeaderException: status.HTTP_400_BAD_REQUEST,
+        PasswordHasherBusyException: status.HTTP_503_SERVICE_UNAVAILABLE,
     }
     status_code = exc_codes.get(type(exc), status.HTTP_401_UNAUTHORIZED)
+    headers = None
+    if status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+        headers = {"Retry-After": "1"}
     return JSONResponse(
         status_code=status_code,
         content={"detail": exc.message},
+        headers=headers,
     )
 
 
@@ -59,7 +68,10 @@ async def user_exception_handler(request: Request, exc: UserServiceException):
 async def currency_exception_handler(
     request: Request, exc: CurrencyRouterException
 ):
-    exc_codes = {InvalidSymbolException: status.HTTP_400_BAD_REQUEST}
+    exc_codes = {
+        InvalidSymbolException: status.HTTP_400_BAD_REQUEST,
+        BatchTooLargeException: status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    }
 
     status_code = exc_codes.get(type(exc))
     return JSONResponse(
@@ -67,6 +79,17 @@ async def currency_exception_handler(
     )
 
 
+async def converter_exception_handler(
+    request: Request, exc: ConverterServiceException
+):
+    exc_codes = {HistoricalRatesNotFoundException: status.HTTP_404_NOT_FOUND}
+
+    status_code = exc_codes.get(type(exc), status.HTTP_503_SERVICE_UNAVAILABLE)
+    return JSONResponse(
+        status_code=status_code, content={"detail": exc.message}
+    )
+
+
 async def custom_request_validation_handler(
     request: Request, err: RequestValidationError
 ) -> JSONResponse:
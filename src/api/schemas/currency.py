@@ -1,4 +1,5 @@
-from typing import List
+import datetime
+from typing import List, Literal
 
 from pydantic import BaseModel, Field
 
@@ -38,6 +39,10 @@ class ConvertRequest(BaseModel):
     to_symbols: List[str] = Field(
         description="Currencies symbols to convert to"
     )
+    at: datetime.datetime | None = Field(
+        default=None,
+        description="Convert with the rates stored at or before this time, UTC if no offset is given",
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -67,3 +72,107 @@ class ConvertRatesResponse(BaseModel):
             }
         ],
     )
+    snapshot_age: float = Field(
+        description="Seconds since the rates were fetched from upstream",
+        examples=[4.2],
+    )
+
+
+class ConvertBatchItemResult(BaseModel):
+    result: ConvertRatesResponse | None = Field(
+        default=None, description="Conversion result if the item succeeded"
+    )
+    error: str | None = Field(
+        default=None,
+        description="Reason the item failed",
+        examples=["Invalid 'from' symbol: 'XYZ'"],
+    )
+
+
+class ConvertBatchResponse(BaseModel):
+    items: List[ConvertBatchItemResult] = Field(
+        description="Results in the same order as the requested items"
+    )
+
+
+class CrossRatesResponse(BaseModel):
+    symbols: List[str] = Field(
+        description="Currency symbols in row and column order",
+        examples=[["ETH", "BTC"]],
+    )
+    matrix: List[List[float]] = Field(
+        description="matrix[i][j] is the amount of symbols[j] for 1 symbols[i]",
+        examples=[[[1.0, 0.03625336], [27.58365291, 1.0]]],
+    )
+    snapshot_age: float = Field(
+        description="Seconds since the rates were fetched from upstream",
+        examples=[4.2],
+    )
+
+
+class ProviderStatus(BaseModel):
+    name: str = Field(
+        description="Currency provider name", examples=["api.coinlore.net"]
+    )
+    breaker_state: Literal["closed", "open", "half_open"] = Field(
+        description="Circuit breaker state of the provider",
+        examples=["closed"],
+    )
+    consecutive_failures: int = Field(
+        description="Provider failures since its last successful call",
+        examples=[0],
+    )
+    retry_after: float = Field(
+        description="Seconds until an open breaker lets a probe through",
+        examples=[0.0],
+    )
+    hedge_delay: float = Field(
+        description="Seconds to wait before hedging with the next provider",
+        examples=[0.35],
+    )
+
+
+class CacheStatus(BaseModel):
+    name: str = Field(description="Cache namespace", examples=["users"])
+    size: int = Field(
+        description="Entries in the local cache of this worker", examples=[42]
+    )
+    hits: int = Field(description="Lookups served locally", examples=[950])
+    backend_hits: int = Field(
+        description="Lookups served by the shared backend", examples=[30]
+    )
+    misses: int = Field(description="Lookups found nowhere", examples=[20])
+    hit_ratio: float | None = Field(
+        default=None,
+        description="Share of lookups served by either tier",
+        examples=[0.98],
+    )
+
+
+class ProviderStatusResponse(BaseModel):
+    providers: List[ProviderStatus] = Field(
+        description="Providers in the order they are asked"
+    )
+    snapshot_version: int | None = Field(
+        default=None,
+        description="Version of the live rates snapshot, if any",
+        examples=[42],
+    )
+    snapshot_age: float | None = Field(
+        default=None,
+        description="Seconds since the rates were fetched from upstream",
+        examples=[4.2],
+    )
+    pair_cache_size: int = Field(
+        default=0,
+        description="Currency pair rates cached for the live snapshot",
+        examples=[120],
+    )
+    pair_cache_hit_ratio: float | None = Field(
+        default=None,
+        description="Share of pair rate lookups served from the cache",
+        examples=[0.97],
+    )
+    caches: List[CacheStatus] = Field(
+        default=[], description="Cache namespaces of this worker"
+    )
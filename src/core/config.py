@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import List, Literal
 
 from dotenv import find_dotenv, load_dotenv
 from pydantic import Field
@@ -25,6 +25,29 @@ class DbSettings(BaseSettings):
 
     PREPARE_DB: Literal["PROD", "TEST"]
 
+    DB_POOL_SIZE: int = Field(
+        default=10, gt=0, description="Connections kept open in the pool"
+    )
+    DB_MAX_OVERFLOW: int = Field(
+        default=20, ge=0, description="Connections opened beyond the pool"
+    )
+    DB_POOL_TIMEOUT: float = Field(
+        default=5.0, gt=0, description="Seconds to wait for a free connection"
+    )
+    DB_POOL_RECYCLE: int = Field(
+        default=1800,
+        description="Seconds before a connection is replaced, -1 for never",
+    )
+    DB_POOL_PRE_PING: bool = Field(
+        default=True, description="Check connections before handing them out"
+    )
+    DB_STATEMENT_CACHE_SIZE: int = Field(
+        default=100,
+        ge=0,
+        description="Prepared statements cached per connection, "
+        "0 behind a transaction-mode pgbouncer",
+    )
+
     model_config = SettingsConfigDict(env_file=find_dotenv(), extra="ignore")
 
     @property
@@ -53,6 +76,11 @@ class JwtSettings(BaseSettings):
         default="HS256",
         description="One of digital signature algorithms for decoding/encoding JWT",
     )
+    VERIFIED_CACHE_SIZE: int = Field(
+        default=10000,
+        ge=0,
+        description="Verified tokens kept to skip decoding them again",
+    )
 
     model_config = SettingsConfigDict(
         env_file=find_dotenv(), env_prefix="JWT_", extra="ignore"
@@ -64,6 +92,134 @@ jwt_settings = JwtSettings()
 
 class CurrencyApiSettings(BaseSettings):
     API_URL: str
+    FALLBACK_API_URLS: List[str] = Field(
+        default=[],
+        description="Coinlore-compatible APIs to hedge and fail over to",
+    )
+
+    HTTP2: bool = Field(default=True)
+    ACCEPT_ENCODING: str = Field(default="gzip, deflate")
+    MAX_CONNECTIONS: int = Field(default=100, gt=0)
+    MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, ge=0)
+    KEEPALIVE_EXPIRY: float = Field(default=30.0, gt=0)
+    CONNECT_TIMEOUT: float = Field(default=5.0, gt=0)
+    READ_TIMEOUT: float = Field(default=10.0, gt=0)
+    WRITE_TIMEOUT: float = Field(default=5.0, gt=0)
+    POOL_TIMEOUT: float = Field(default=5.0, gt=0)
+
+    CATALOG_TTL: float = Field(
+        default=300.0, gt=0, description="Seconds to cache the ticker list"
+    )
+    CATALOG_STALE_TTL: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Seconds an expired ticker list is served while reloading",
+    )
+    CATALOG_PAGE_SIZE: int = Field(
+        default=100, gt=0, description="Tickers per upstream /tickers/ page"
+    )
+    CATALOG_MAX_PAGES: int = Field(
+        default=500, gt=0, description="Upper bound of pages per catalog load"
+    )
+    UPSTREAM_CONCURRENCY: int = Field(
+        default=8, gt=0, description="Parallel upstream requests per load"
+    )
+    UPSTREAM_RETRIES: int = Field(
+        default=3, ge=0, description="Retries of a failed upstream request"
+    )
+    UPSTREAM_RETRY_BACKOFF: float = Field(
+        default=0.5, ge=0, description="Base delay in seconds between retries"
+    )
+    RATES_REFRESH_ENABLED: bool = Field(
+        default=True,
+        description="Poll prices of the whole catalog in the background, "
+        "otherwise fetch the requested ones on demand",
+    )
+    RATES_REFRESH_INTERVAL: float = Field(
+        default=30.0, gt=0, description="Seconds between price polls"
+    )
+    RATES_STALE_BUDGET: float = Field(
+        default=300.0,
+        gt=0,
+        description="Max age in seconds of a snapshot that is still served",
+    )
+    RATES_SHARED_MEMORY: str | None = Field(
+        default=None,
+        description="Shared memory segment name, when set one worker of the "
+        "host refreshes the rates and the others read them from it",
+    )
+    RATES_SHARED_CAPACITY: int = Field(
+        default=16384, gt=0, description="Max symbols in the shared segment"
+    )
+    RATES_SHARED_POLL_INTERVAL: float = Field(
+        default=0.5,
+        gt=0,
+        description="Seconds between reads of the shared rates segment",
+    )
+    RATES_WAIT_TIMEOUT: float = Field(
+        default=5.0,
+        ge=0,
+        description="Seconds to wait for the first rate snapshot",
+    )
+    PRICE_BATCH_SIZE: int = Field(
+        default=50, gt=0, description="Ticker ids per upstream price request"
+    )
+    PRICE_COALESCE_WINDOW: float = Field(
+        default=0.005,
+        ge=0,
+        description="Seconds to collect price lookups into one request",
+    )
+    BREAKER_FAILURE_THRESHOLD: int = Field(
+        default=5,
+        gt=0,
+        description="Consecutive failures that open the circuit",
+    )
+    BREAKER_RESET_TIMEOUT: float = Field(
+        default=30.0, gt=0, description="Seconds before a probe after opening"
+    )
+    STREAM_BUFFER_SIZE: int = Field(
+        default=8,
+        gt=0,
+        description="Updates buffered per stream client before merging",
+    )
+    STREAM_HEARTBEAT_INTERVAL: float = Field(
+        default=15.0, gt=0, description="Seconds between stream keep-alives"
+    )
+    STREAM_MAX_SYMBOLS: int = Field(
+        default=100, gt=0, description="Max symbols per stream subscription"
+    )
+    HEDGE_QUANTILE: float = Field(
+        default=0.95,
+        gt=0,
+        le=1,
+        description="Latency quantile of a provider before hedging it",
+    )
+    HEDGE_MIN_DELAY: float = Field(
+        default=0.05, ge=0, description="Lower bound of the hedge delay"
+    )
+    HEDGE_MAX_DELAY: float = Field(
+        default=2.0,
+        gt=0,
+        description="Hedge delay until a provider has latency samples",
+    )
+    SNAPSHOT_PERSIST: bool = Field(
+        default=True, description="Store every rate snapshot in the database"
+    )
+    SNAPSHOT_QUEUE_SIZE: int = Field(
+        default=4, gt=0, description="Snapshots waiting to be persisted"
+    )
+    HISTORY_CACHE_SIZE: int = Field(
+        default=32, gt=0, description="Decoded historical snapshots to keep"
+    )
+    PAIR_CACHE_SIZE: int = Field(
+        default=4096, gt=0, description="Currency pair rates to keep"
+    )
+    MATRIX_MAX_SYMBOLS: int = Field(
+        default=100, gt=0, description="Max symbols in a cross-rate matrix"
+    )
+    BATCH_MAX_SIZE: int = Field(
+        default=100, gt=0, description="Max conversions per batch request"
+    )
 
     model_config = SettingsConfigDict(
         env_file=find_dotenv(), env_prefix="CURRENCY_", extra="ignore"
@@ -71,3 +227,49 @@ class CurrencyApiSettings(BaseSettings):
 
 
 currency_api_settings = CurrencyApiSettings()
+
+
+class PasswordHashSettings(BaseSettings):
+    WORKERS: int = Field(
+        default=4, gt=0, description="Threads hashing and checking passwords"
+    )
+    QUEUE_SIZE: int = Field(
+        default=16,
+        ge=0,
+        description="Password checks waiting for a thread before new ones "
+        "are rejected",
+    )
+
+    model_config = SettingsConfigDict(
+        env_file=find_dotenv(), env_prefix="PASSWORD_HASH_", extra="ignore"
+    )
+
+
+password_hash_settings = PasswordHashSettings()
+
+
+class CacheSettings(BaseSettings):
+    BACKEND_URL: str | None = Field(
+        default=None,
+        description="Shared cache behind the worker-local one, "
+        "redis://host:port/db or memory://, none when unset",
+    )
+    BACKEND_POOL_SIZE: int = Field(
+        default=8, gt=0, description="Max connections to the cache backend"
+    )
+    BACKEND_TIMEOUT: float = Field(
+        default=0.5, gt=0, description="Seconds to wait for the cache backend"
+    )
+    USER_TTL: float = Field(
+        default=60.0, gt=0, description="Seconds a user lookup is cached"
+    )
+    USER_MAX_SIZE: int = Field(
+        default=10000, gt=0, description="Users kept in the local cache"
+    )
+
+    model_config = SettingsConfigDict(
+        env_file=find_dotenv(), env_prefix="CACHE_", extra="ignore"
+    )
+
+
+cache_settings = CacheSettings()
@@ -0,0 +1,34 @@
+from typing import Any
+
+import orjson
+from httpx import AsyncClient, Limits, Timeout
+
+from src.core.config import currency_api_settings
+
+
+def create_http_client() -> AsyncClient:
+    return AsyncClient(
+        http2=currency_api_settings.HTTP2,
+        headers={"Accept-Encoding": currency_api_settings.ACCEPT_ENCODING},
+        limits=Limits(
+            max_connections=currency_api_settings.MAX_CONNECTIONS,
+            max_keepalive_connections=(
+                currency_api_settings.MAX_KEEPALIVE_CONNECTIONS
+            ),
+            keepalive_expiry=currency_api_settings.KEEPALIVE_EXPIRY,
+        ),
+        timeout=Timeout(
+            connect=currency_api_settings.CONNECT_TIMEOUT,
+            read=currency_api_settings.READ_TIMEOUT,
+            write=currency_api_settings.WRITE_TIMEOUT,
+            pool=currency_api_settings.POOL_TIMEOUT,
+        ),
+    )
+
+
+async def get_json(
+    async_client: AsyncClient, url: str, params: dict | None = None
+) -> Any:
+    response = await async_client.get(url=url, params=params)
+    response.raise_for_status()
+    return orjson.loads(response.content)
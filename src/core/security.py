@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+import time
 import uuid
 from enum import Enum
 
@@ -8,6 +10,7 @@ from pydantic import BaseModel
 from typing_extensions import TypedDict
 
 from src.core.config import jwt_settings
+from src.utils.cache import LRUCache
 
 access_token_header = APIKeyHeader(
     name="Authorization",
@@ -88,3 +91,43 @@ class JwtAuth:
             raise ValueError("Token has expired")
         except jwt.InvalidTokenError:
             raise ValueError("Invalid token")
+
+
+class VerifiedTokenCache:
+    """Payloads of tokens that passed verification, until they expire
+
+    Entries are keyed by a digest, so the cache holds no usable token.
+    """
+
+    def __init__(self, maxsize: int):
+        # digest -> (expires at, payload)
+        self._payloads: LRUCache[bytes, tuple[float, JwtPayload]] = LRUCache(
+            maxsize
+        )
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def get(self, token: str) -> JwtPayload | None:
+        key = _digest(token)
+        entry = self._payloads.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._payloads.invalidate(key)
+            return None
+        return entry[1]
+
+    def add(self, token: str, payload: JwtPayload) -> None:
+        expires_at = payload.exp.timestamp()
+        if expires_at > time.time():
+            self._payloads.set(_digest(token), (expires_at, payload))
+
+    def evict_subject(self, sub: str) -> None:
+        for key, (_, payload) in self._payloads.items():
+            if payload.sub == sub:
+                self._payloads.invalidate(key)
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
+    AsyncEngine,
     async_sessionmaker,
     create_async_engine,
 )
@@ -7,7 +8,26 @@ from sqlalchemy.orm import DeclarativeBase, declared_attr
 
 from src.core.config import db_settings
 
-engine = create_async_engine(db_settings.DATABASE_URL, echo=True)
+
+def create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_size=db_settings.DB_POOL_SIZE,
+        max_overflow=db_settings.DB_MAX_OVERFLOW,
+        pool_timeout=db_settings.DB_POOL_TIMEOUT,
+        pool_recycle=db_settings.DB_POOL_RECYCLE,
+        pool_pre_ping=db_settings.DB_POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": db_settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": (
+                db_settings.DB_STATEMENT_CACHE_SIZE
+            ),
+        },
+    )
+
+
+# connects lazily, the app disposes of it on shutdown
+engine = create_engine(db_settings.DATABASE_URL)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 
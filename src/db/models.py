@@ -1,7 +1,8 @@
+import datetime
 import uuid
 from typing import List
 
-from sqlalchemy import Boolean, ForeignKey
+from sqlalchemy import Boolean, DateTime, Double, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -39,3 +40,16 @@ class JwtToken(Base):
     user: Mapped["User"] = relationship(
         back_populates="jwt_tokens", passive_deletes=True, single_parent=True
     )
+
+
+class RateSnapshotPrice(Base):
+    __tablename__ = "rate_snapshots"
+
+    # captured_at leads the primary key, so its btree doubles as the
+    # time-ordered index for point-in-time lookups
+
+    captured_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
+    )
+    symbol: Mapped[str] = mapped_column(primary_key=True)
+    price_usd: Mapped[float] = mapped_column(Double)
@@ -9,3 +9,7 @@ class CurrencyRouterException(GenericException):
 
 class InvalidSymbolException(CurrencyRouterException):
     pass
+
+
+class BatchTooLargeException(CurrencyRouterException):
+    pass
@@ -17,6 +17,11 @@ class WrongAuthorizationHeaderException(AuthServiceException):
         super().__init__(message)
 
 
+class PasswordHasherBusyException(AuthServiceException):
+    def __init__(self, message: str = "Too many password checks, retry later"):
+        super().__init__(message)
+
+
 class TokenServiceException(GenericException):
     """Base exception for token-related errors"""
 
@@ -77,3 +82,27 @@ class UserAlreadyExistsException(UserServiceException):
 class UserNotFoundException(UserServiceException):
     def __init__(self, message: str = "User not found"):
         super().__init__(message)
+
+
+# converter exceptions
+class ConverterServiceException(GenericException):
+    """Base exception for currency rates provider errors"""
+
+    pass
+
+
+class RatesUnavailableException(ConverterServiceException):
+    def __init__(
+        self, message: str = "Currency rates are temporarily unavailable"
+    ):
+        super().__init__(message)
+
+
+class UpstreamUnavailableException(ConverterServiceException):
+    def __init__(self, message: str = "Currency provider is unavailable"):
+        super().__init__(message)
+
+
+class HistoricalRatesNotFoundException(ConverterServiceException):
+    def __init__(self, message: str = "No rates recorded for this time"):
+        super().__init__(message)
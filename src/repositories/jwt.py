@@ -19,6 +19,29 @@ class JwtTokenRepository:
         result = await self.__session.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_active_tokens(
+        self, token_type: str
+    ) -> list[tuple[str, str, str | None]]:
+        query = select(
+            self.model.id, self.model.email, self.model.device_id
+        ).filter(
+            self.model.token_type == token_type,
+            self.model.is_revoked.is_(False),
+        )
+        result = await self.__session.execute(query)
+        return [tuple(row) for row in result]
+
+    async def revoke_token(self, token_id: str) -> bool:
+        query = (
+            update(self.model)
+            .filter(
+                self.model.id == token_id, self.model.is_revoked.is_(False)
+            )
+            .values(is_revoked=True)
+        )
+        result = await self.__session.execute(query)
+        return result.rowcount > 0
+
     async def revoke_tokens(self, filters: dict) -> int:
         query = update(self.model).filter_by(**filters).values(is_revoked=True)
         result = await self.__session.execute(query)
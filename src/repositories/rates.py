@@ -0,0 +1,57 @@
+import datetime
+from itertools import repeat
+from typing import Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import RateSnapshotPrice
+
+
+class RateSnapshotRepository:
+    model = RateSnapshotPrice
+
+    def __init__(self, session: AsyncSession):
+        self.__session = session
+
+    async def add_snapshot(
+        self,
+        captured_at: datetime.datetime,
+        symbols: Sequence[str],
+        prices: Sequence[float],
+    ) -> int:
+        # COPY the whole price vector in one round trip instead of
+        # issuing an INSERT per symbol
+        connection = await self.__session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            self.model.__tablename__,
+            records=zip(repeat(captured_at), symbols, prices),
+            columns=["captured_at", "symbol", "price_usd"],
+        )
+        return len(symbols)
+
+    async def get_snapshot_at(
+        self, at: datetime.datetime
+    ) -> list[tuple[datetime.datetime, str, float]]:
+        # both lookups are range scans on the primary key, whose leading
+        # column is captured_at
+        captured_at = (
+            select(func.max(self.model.captured_at))
+            .where(self.model.captured_at <= at)
+            .scalar_subquery()
+        )
+        query = select(
+            self.model.captured_at, self.model.symbol, self.model.price_usd
+        ).where(self.model.captured_at == captured_at)
+        result = await self.__session.execute(query)
+        return result.all()
+
+    async def get_next_capture_time(
+        self, after: datetime.datetime
+    ) -> datetime.datetime | None:
+        query = select(func.min(self.model.captured_at)).where(
+            self.model.captured_at > after
+        )
+        result = await self.__session.execute(query)
+        return result.scalar_one_or_none()
@@ -1,8 +1,16 @@
+import logging
 import secrets
 
+from sqlalchemy.exc import SQLAlchemyError
+
 from src.api.schemas.auth import AuthTokenPair, JwtTokenCreate, JwtTokenFilter
 from src.api.schemas.user import UserReturnSchema
-from src.core.security import JwtAuth, JwtDataToEncode, TokenTypeEnum
+from src.core.security import (
+    JwtAuth,
+    JwtDataToEncode,
+    TokenTypeEnum,
+    VerifiedTokenCache,
+)
 from src.exceptions.services import (
     InvalidTokenException,
     RevokedTokenException,
@@ -13,10 +21,77 @@ from src.exceptions.services import (
 from src.utils.password import PasswordHasher
 from src.utils.unit_of_work import IUnitOfWork
 
+logger = logging.getLogger(__name__)
+
+
+class RefreshTokenIndex:
+    """Issued refresh tokens that are not revoked, loaded from jwttokens
+
+    Only answers for tokens this worker knows about. A miss is checked in
+    the database, which also catches tokens issued by other workers, and
+    rotating a token re-checks it there, so a revocation made elsewhere
+    is never overlooked.
+    """
+
+    def __init__(self):
+        # jti -> (email, device id)
+        self._tokens: dict[str, tuple[str, str | None]] = {}
+        self._by_email: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    async def load(self, uow: IUnitOfWork) -> None:
+        try:
+            async with uow:
+                rows = await uow.jwt_token.get_active_tokens(
+                    TokenTypeEnum.REFRESH
+                )
+        except (SQLAlchemyError, OSError) as e:
+            # every token is then checked in the database
+            logger.warning("Failed to load refresh tokens: %r", e)
+            return
+
+        self._tokens.clear()
+        self._by_email.clear()
+        for token_id, email, device_id in rows:
+            self.add(token_id, email, device_id)
+        logger.info("Loaded %s active refresh tokens", len(rows))
+
+    def is_active(self, token_id: str) -> bool:
+        return token_id in self._tokens
+
+    def add(self, token_id: str, email: str, device_id: str | None) -> None:
+        self._tokens[token_id] = (email, device_id)
+        self._by_email.setdefault(email, set()).add(token_id)
+
+    def discard(self, token_id: str) -> None:
+        entry = self._tokens.pop(token_id, None)
+        if entry is not None:
+            self._drop_from_email(entry[0], token_id)
+
+    def revoke(self, email: str, device_id: str | None = None) -> None:
+        for token_id in list(self._by_email.get(email, ())):
+            if device_id is None or self._tokens[token_id][1] == device_id:
+                self.discard(token_id)
+
+    def _drop_from_email(self, email: str, token_id: str) -> None:
+        token_ids = self._by_email[email]
+        token_ids.discard(token_id)
+        if not token_ids:
+            del self._by_email[email]
+
 
 class AuthService:
-    def __init__(self, uow: IUnitOfWork):
+    def __init__(
+        self,
+        uow: IUnitOfWork,
+        token_cache: VerifiedTokenCache | None = None,
+        refresh_tokens: RefreshTokenIndex | None = None,
+    ):
         self.uow = uow
+        self.token_cache = token_cache
+        self.refresh_tokens = refresh_tokens
 
     async def login(
         self, username: str, password: str, device_id: str
@@ -42,31 +117,43 @@ class AuthService:
         decoded_payload = await self.verify_token_and_type(
             refresh_token, TokenTypeEnum.REFRESH
         )
-        async with self.uow as uow:
-            is_revoked = await uow.jwt_token.is_token_revoked(
-                decoded_payload.jti
-            )
+        if self.refresh_tokens is None or not self.refresh_tokens.is_active(
+            decoded_payload.jti
+        ):
+            async with self.uow as uow:
+                is_revoked = await uow.jwt_token.is_token_revoked(
+                    decoded_payload.jti
+                )
 
-            if is_revoked is None:
-                raise InvalidTokenException()
+                if is_revoked is None:
+                    raise InvalidTokenException()
 
-            if is_revoked:
-                raise RevokedTokenException()
+                if is_revoked:
+                    raise RevokedTokenException()
 
         return await self._get_new_token_pair(
-            JwtDataToEncode(sub=decoded_payload.sub, device_id=device_id)
+            JwtDataToEncode(sub=decoded_payload.sub, device_id=device_id),
+            rotated_token_id=decoded_payload.jti,
         )
 
     async def verify_token_and_type(
         self, token: str, expected_type: TokenTypeEnum, verify_exp: bool = True
     ):
-        try:
-            decoded_payload = JwtAuth.decode_token(token, verify_exp)
-        except ValueError as e:
-            err = str(e)
-            if "expired" in err:
-                raise TokenExpiredException(str(err))
-            raise InvalidTokenException(str(err))
+        decoded_payload = None
+        if self.token_cache is not None:
+            decoded_payload = self.token_cache.get(token)
+
+        if decoded_payload is None:
+            try:
+                decoded_payload = JwtAuth.decode_token(token, verify_exp)
+            except ValueError as e:
+                err = str(e)
+                if "expired" in err:
+                    raise TokenExpiredException(str(err))
+                raise InvalidTokenException(str(err))
+
+            if self.token_cache is not None:
+                self.token_cache.add(token, decoded_payload)
 
         if decoded_payload.typ != expected_type:
             raise WrongTokenTypeException(
@@ -79,7 +166,12 @@ class AuthService:
         async with self.uow as uow:
             affected_tokens = await uow.jwt_token.revoke_tokens(filters)
             await uow.commit()
-            return affected_tokens
+
+        if self.refresh_tokens is not None:
+            self.refresh_tokens.revoke(
+                filters["email"], filters.get("device_id")
+            )
+        return affected_tokens
 
     async def _authenticate_user(
         self, username: str, password: str
@@ -92,30 +184,39 @@ class AuthService:
                     "Invalid username or password"
                 )
 
-            current_username_digest = username.encode()
-            correct_username_digest = db_user.username.encode()
-
-            is_username_correct = secrets.compare_digest(
-                current_username_digest, correct_username_digest
-            )
-            is_password_correct = PasswordHasher.verify(
-                password, db_user.hashed_password
-            )
-            if not (is_username_correct and is_password_correct):
-                raise UserNotAuthorizedException(
-                    "Invalid username or password"
-                )
-            return UserReturnSchema.model_validate(
+            user = UserReturnSchema.model_validate(
                 db_user, from_attributes=True
             )
+            hashed_password = db_user.hashed_password
+
+        # checked after the session is closed, bcrypt is slow
+        current_username_digest = username.encode()
+        correct_username_digest = user.username.encode()
+
+        is_username_correct = secrets.compare_digest(
+            current_username_digest, correct_username_digest
+        )
+        is_password_correct = await PasswordHasher.verify_async(
+            password, hashed_password
+        )
+        if not (is_username_correct and is_password_correct):
+            raise UserNotAuthorizedException("Invalid username or password")
+        return user
 
     async def _get_new_token_pair(
         self,
         data: JwtDataToEncode,
+        rotated_token_id: str | None = None,
     ) -> AuthTokenPair:
         refresh_payload = JwtAuth.create_payload(data, TokenTypeEnum.REFRESH)
 
         async with self.uow as uow:
+            if rotated_token_id is not None:
+                # the database decides if a concurrent refresh or another
+                # worker revoked the token first
+                if not await uow.jwt_token.revoke_token(rotated_token_id):
+                    raise RevokedTokenException()
+
             filters = {"email": data["sub"], "device_id": data["device_id"]}
             await uow.jwt_token.revoke_tokens(filters)
 
@@ -128,6 +229,14 @@ class AuthService:
             await uow.jwt_token.add_token(db_token.model_dump())
             await uow.commit()
 
+        if self.refresh_tokens is not None:
+            if rotated_token_id is not None:
+                self.refresh_tokens.discard(rotated_token_id)
+            self.refresh_tokens.revoke(db_token.email, db_token.device_id)
+            self.refresh_tokens.add(
+                db_token.id, db_token.email, db_token.device_id
+            )
+
         access_payload = JwtAuth.create_payload(data, TokenTypeEnum.ACCESS)
         access_token = JwtAuth.create_token(access_payload)
         refresh_token = JwtAuth.create_token(refresh_payload)
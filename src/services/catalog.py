@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple
+
+import orjson
+from httpx import HTTPError
+
+from src.core.config import currency_api_settings
+from src.services.providers import RateProvider
+from src.utils.cache import CacheCodec
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.strip().upper()
+
+
+class CatalogEntry(NamedTuple):
+    id: str
+    symbol: str
+    name: str
+    rank: int
+
+    @property
+    def priority(self) -> tuple[int, str]:
+        return self.rank, self.id
+
+
+class TickerCatalog:
+    def __init__(
+        self,
+        entries: Iterable[CatalogEntry],
+        version: int = 0,
+        page_count: int = 1,
+        load_seconds: float = 0.0,
+    ):
+        self.entries = tuple(entries)
+        self.version = version
+        self.page_count = page_count
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+        # several tickers may share a symbol, the best ranked one wins
+        index: dict[str, CatalogEntry] = {}
+        for entry in self.entries:
+            key = normalize_symbol(entry.symbol)
+            current = index.get(key)
+            if current is None or entry.priority < current.priority:
+                index[key] = entry
+        self.index: Mapping[str, CatalogEntry] = MappingProxyType(index)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, symbol: str) -> bool:
+        return normalize_symbol(symbol) in self.index
+
+    def resolve(self, symbol: str) -> CatalogEntry | None:
+        return self.index.get(normalize_symbol(symbol))
+
+
+def _encode_catalog(catalog: TickerCatalog) -> bytes:
+    return orjson.dumps(
+        {
+            "version": catalog.version,
+            "page_count": catalog.page_count,
+            "load_seconds": catalog.load_seconds,
+            "entries": [tuple(entry) for entry in catalog.entries],
+        }
+    )
+
+
+def _decode_catalog(data: bytes) -> TickerCatalog:
+    catalog = orjson.loads(data)
+    return TickerCatalog(
+        map(CatalogEntry._make, catalog["entries"]),
+        version=catalog["version"],
+        page_count=catalog["page_count"],
+        load_seconds=catalog["load_seconds"],
+    )
+
+
+CATALOG_CODEC = CacheCodec(encode=_encode_catalog, decode=_decode_catalog)
+
+
+def parse_catalog_entries(pages: list[list[dict]]) -> list[CatalogEntry]:
+    # pages are fetched concurrently, so a ticker whose rank moved
+    # during the load may appear twice
+    entries: dict[str, CatalogEntry] = {}
+    position = 0
+    for page in pages:
+        for currency in page:
+            position += 1
+            ticker_id = str(currency["id"])
+            if ticker_id in entries:
+                continue
+
+            # _make skips the keyword handling of the generated __new__
+            entries[ticker_id] = CatalogEntry._make(
+                (
+                    ticker_id,
+                    currency["symbol"],
+                    currency["name"],
+                    int(currency.get("rank") or position),
+                )
+            )
+    return list(entries.values())
+
+
+class CatalogLoader:
+    """Loads every /tickers/ page of the upstream listing into one catalog"""
+
+    def __init__(self, provider: RateProvider):
+        self.provider = provider
+        self.page_size = currency_api_settings.CATALOG_PAGE_SIZE
+        self.max_pages = currency_api_settings.CATALOG_MAX_PAGES
+        self._version = 0
+
+    async def load(self) -> TickerCatalog:
+        started_at = time.perf_counter()
+
+        first_page = await self._fetch_page(0)
+        pages = [first_page["data"]]
+
+        total = (first_page.get("info") or {}).get("coins_num")
+        if total is not None:
+            last_start = min(int(total), self.page_size * self.max_pages)
+            starts = range(self.page_size, last_start, self.page_size)
+            pages += await self._fetch_pages(starts)
+        else:
+            # without a total, follow the pages until a short one
+            while (
+                len(pages[-1]) == self.page_size
+                and len(pages) < self.max_pages
+            ):
+                page = await self._fetch_page(len(pages) * self.page_size)
+                pages.append(page["data"])
+
+        self._version += 1
+        catalog = TickerCatalog(
+            parse_catalog_entries(pages),
+            version=self._version,
+            page_count=len(pages),
+            load_seconds=time.perf_counter() - started_at,
+        )
+        logger.info(
+            "Loaded ticker catalog v%s: %s tickers, %s pages in %.2fs",
+            catalog.version,
+            len(catalog),
+            catalog.page_count,
+            catalog.load_seconds,
+        )
+        return catalog
+
+    async def _fetch_pages(self, starts: Iterable[int]) -> list[list[dict]]:
+        semaphore = asyncio.Semaphore(
+            currency_api_settings.UPSTREAM_CONCURRENCY
+        )
+
+        async def fetch(start: int) -> list[dict]:
+            async with semaphore:
+                return (await self._fetch_page(start))["data"]
+
+        tasks = [asyncio.ensure_future(fetch(start)) for start in starts]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # a partial catalog is useless, drop the remaining pages
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _fetch_page(self, start: int) -> dict:
+        retries = currency_api_settings.UPSTREAM_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                return await self.provider.fetch_tickers_page(
+                    start, self.page_size
+                )
+            except (HTTPError, ValueError):
+                if attempt == retries:
+                    raise
+                logger.warning(
+                    "Retrying /tickers/ page at %s, attempt %s",
+                    start,
+                    attempt + 1,
+                )
+                await asyncio.sleep(
+                    currency_api_settings.UPSTREAM_RETRY_BACKOFF * 2**attempt
+                )
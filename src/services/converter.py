@@ -1,54 +1,280 @@
-from typing import List
+import asyncio
+import datetime
+import logging
+from typing import List, Sequence
 
-from httpx import AsyncClient
+import numpy as np
+from httpx import AsyncClient, HTTPError
 
-from src.api.schemas.currency import CurrencyInfo
+from src.api.schemas.currency import CurrencyInfo, CurrencyListResponse
 from src.core.config import currency_api_settings
+from src.exceptions.services import (
+    HistoricalRatesNotFoundException,
+    RatesUnavailableException,
+    UpstreamUnavailableException,
+)
+from src.services.catalog import CATALOG_CODEC, CatalogLoader, TickerCatalog
+from src.services.providers import ProviderPool, create_provider_pool
+from src.services.rates import (
+    SNAPSHOT_CODEC,
+    PairRateCache,
+    RateHistory,
+    RateSnapshot,
+    RateTable,
+)
+from src.utils.batching import RequestCoalescer
+from src.utils.cache import AsyncTTLCache, TieredCache
+from src.utils.prerendered import PreRenderedJSON
+
+CATALOG_CACHE_KEY = "tickers"
+RATES_CACHE_KEY = "latest"
+
+logger = logging.getLogger(__name__)
 
 
 class ConverterService:
-    def __init__(self):
-        self.api_url = currency_api_settings.API_URL
-        self.async_client = AsyncClient()
+    def __init__(
+        self,
+        async_client: AsyncClient,
+        rate_history: RateHistory | None = None,
+        providers: ProviderPool | None = None,
+        cache: TieredCache | None = None,
+    ):
+        self.async_client = async_client
+        self.rate_history = rate_history
+        self.refresh_enabled = currency_api_settings.RATES_REFRESH_ENABLED
+        # set while another worker refreshes the shared rates
+        self.follow_shared_rates = False
+        self.providers = providers or create_provider_pool(async_client)
+        self.catalog_loader = CatalogLoader(self.providers)
+        self.catalog_cache: AsyncTTLCache[str, TickerCatalog] = AsyncTTLCache(
+            ttl=currency_api_settings.CATALOG_TTL,
+            stale_ttl=currency_api_settings.CATALOG_STALE_TTL,
+        )
+        self.cache = cache or TieredCache()
+        # the catalog and rate caches above are the local tier
+        self.shared_catalog = self.cache.namespace(
+            "catalog",
+            ttl=currency_api_settings.CATALOG_TTL,
+            maxsize=0,
+            codec=CATALOG_CODEC,
+        )
+        self.shared_snapshot = self.cache.namespace(
+            "rates",
+            ttl=currency_api_settings.RATES_REFRESH_INTERVAL,
+            maxsize=0,
+            codec=SNAPSHOT_CODEC,
+        )
+        self.price_coalescer: RequestCoalescer[str, float] = RequestCoalescer(
+            self._fetch_ticker_prices,
+            window=currency_api_settings.PRICE_COALESCE_WINDOW,
+            max_batch=currency_api_settings.PRICE_BATCH_SIZE,
+            concurrency=currency_api_settings.UPSTREAM_CONCURRENCY,
+        )
+        self.rate_table = RateTable()
+        self.pair_rates = PairRateCache(currency_api_settings.PAIR_CACHE_SIZE)
+        self.rate_table.add_listener(self.pair_rates.update)
+        self._rates_refresh: asyncio.Task | None = None
+        self._currencies: tuple[TickerCatalog, List[CurrencyInfo]] | None = (
+            None
+        )
+        self._currency_list: (
+            tuple[List[CurrencyInfo], PreRenderedJSON] | None
+        ) = None
+
+    async def close(self) -> None:
+        await self.catalog_cache.close()
+        await self.price_coalescer.close()
+        if self._rates_refresh is not None:
+            self._rates_refresh.cancel()
+            await asyncio.gather(self._rates_refresh, return_exceptions=True)
+
+    async def get_catalog(self) -> TickerCatalog:
+        try:
+            return await self.catalog_cache.get_or_load(
+                CATALOG_CACHE_KEY, self._load_catalog
+            )
+        except (HTTPError, ValueError, KeyError) as e:
+            raise UpstreamUnavailableException(
+                "Currency list is temporarily unavailable"
+            ) from e
 
     async def get_available_symbols(self) -> List[CurrencyInfo]:
-        response = await self.async_client.get(url=f"{self.api_url}/tickers/")
-        data = response.json()
-        return [
-            CurrencyInfo(symbol=currency["symbol"], name=currency["name"])
-            for currency in data["data"]
-        ]
+        catalog = await self.get_catalog()
+        if self._currencies is None or self._currencies[0] is not catalog:
+            # built once per catalog version instead of on every call
+            currencies = [
+                CurrencyInfo(symbol=entry.symbol, name=entry.name)
+                for entry in catalog.entries
+            ]
+            self._currencies = catalog, currencies
+        return self._currencies[1]
+
+    async def get_currency_list(self) -> PreRenderedJSON:
+        currencies = await self.get_available_symbols()
+        if (
+            self._currency_list is None
+            or self._currency_list[0] is not currencies
+        ):
+            rendered = PreRenderedJSON.from_model(
+                CurrencyListResponse(currencies=currencies)
+            )
+            self._currency_list = currencies, rendered
+        return self._currency_list[1]
+
+    async def get_rates(
+        self, symbols: Sequence[str] | None = None
+    ) -> RateSnapshot:
+        if symbols is not None and not self.refresh_enabled:
+            return await self._get_rates_on_demand(symbols)
+
+        snapshot = self.rate_table.snapshot
+        if snapshot is None:
+            self._schedule_rates_refresh()
+            snapshot = await self.rate_table.wait_ready(
+                currency_api_settings.RATES_WAIT_TIMEOUT
+            )
+        if snapshot is None:
+            raise RatesUnavailableException()
+
+        # serve the last good snapshot while a refresh catches up
+        if snapshot.age > currency_api_settings.RATES_REFRESH_INTERVAL:
+            self._schedule_rates_refresh()
+        if snapshot.age > currency_api_settings.RATES_STALE_BUDGET:
+            raise RatesUnavailableException("Currency rates are outdated")
+        return snapshot
+
+    async def refresh_rates(self) -> RateSnapshot:
+        return await asyncio.shield(self._start_rates_refresh())
+
+    async def get_historical_rates(
+        self, at: datetime.datetime
+    ) -> RateSnapshot:
+        if self.rate_history is None:
+            raise RatesUnavailableException("Rates history is not available")
+
+        snapshot = await self.rate_history.get_snapshot_at(at)
+        if snapshot is None:
+            raise HistoricalRatesNotFoundException(
+                f"No rates recorded at or before {at.isoformat()}"
+            )
+        return snapshot
 
     async def convert_currency(
-        self, from_symbol: str, to_symbols: List[str], amount: float = 1.0
+        self,
+        from_symbol: str,
+        to_symbols: List[str],
+        amount: float = 1.0,
+        snapshot: RateSnapshot | None = None,
     ) -> dict[str, float]:
-        available_currencies = await self.async_client.get(
-            url=f"{self.api_url}/tickers/"
-        )
-        currencies_data = available_currencies.json()["data"]
+        if snapshot is None:
+            snapshot = await self.get_rates()
+
+        if from_symbol not in snapshot.index:
+            raise RatesUnavailableException(
+                f"No rate available for '{from_symbol}'"
+            )
 
-        to_symbols.append(from_symbol)
-        currency_ids = [
-            currency["id"]
-            for currency in currencies_data
-            if currency["symbol"] in to_symbols
+        targets = [
+            symbol
+            for symbol in dict.fromkeys(to_symbols)
+            if symbol != from_symbol and symbol in snapshot.index
         ]
-        currency_ids_query = ",".join(currency_ids)
+        ratios = self.pair_rates.get_many(snapshot, from_symbol, targets)
+        if ratios is None:
+            values = snapshot.convert(from_symbol, targets, amount)
+        else:
+            values = np.multiply(ratios, amount)
+        return dict(zip(targets, np.round(values, 8).tolist()))
 
-        currency_rates_response = await self.async_client.get(
-            url=f"{self.api_url}/ticker/", params={"id": currency_ids_query}
-        )
-        currency_rates_data = currency_rates_response.json()
-        for currency_info in currency_rates_data:
-            if currency_info["symbol"] == from_symbol:
-                base_currency_rate = float(currency_info["price_usd"])
-                break
-
-        conversion_rates: dict[str, float] = {
-            currency["symbol"]: round(
-                base_currency_rate * amount / float(currency["price_usd"]), 8
+    async def get_cross_rates(
+        self, symbols: List[str], snapshot: RateSnapshot | None = None
+    ) -> List[List[float]]:
+        if snapshot is None:
+            snapshot = await self.get_rates()
+
+        missing = [
+            symbol for symbol in symbols if symbol not in snapshot.index
+        ]
+        if missing:
+            raise RatesUnavailableException(
+                f"No rates available for {missing}"
             )
-            for currency in currency_rates_data
-            if currency["symbol"] != from_symbol
+        return np.round(snapshot.cross_rates(symbols), 8).tolist()
+
+    async def fetch_prices(
+        self, catalog: TickerCatalog, symbols: Sequence[str] | None = None
+    ) -> dict[str, float]:
+        if symbols is None:
+            entries = list(catalog.index.values())
+        else:
+            entries = [catalog.resolve(symbol) for symbol in symbols]
+            entries = [entry for entry in entries if entry is not None]
+
+        prices = await self.price_coalescer.load(entry.id for entry in entries)
+        return {
+            entry.symbol: prices[entry.id]
+            for entry in entries
+            if entry.id in prices
         }
-        return conversion_rates
+
+    def _start_rates_refresh(self) -> asyncio.Task:
+        if self._rates_refresh is None or self._rates_refresh.done():
+            self._rates_refresh = asyncio.ensure_future(self._refresh_rates())
+            self._rates_refresh.add_done_callback(self._on_rates_refreshed)
+        return self._rates_refresh
+
+    def _schedule_rates_refresh(self) -> None:
+        if not self.follow_shared_rates:
+            self._start_rates_refresh()
+
+    async def _get_rates_on_demand(
+        self, symbols: Sequence[str]
+    ) -> RateSnapshot:
+        catalog = await self.get_catalog()
+        try:
+            prices = await self.fetch_prices(catalog, symbols)
+        except (HTTPError, ValueError, KeyError) as e:
+            raise UpstreamUnavailableException(
+                "Currency rates are temporarily unavailable"
+            ) from e
+        return RateSnapshot.from_prices(0, prices)
+
+    async def _load_catalog(self) -> TickerCatalog:
+        return await self.shared_catalog.get_or_load(
+            CATALOG_CACHE_KEY, self.catalog_loader.load
+        )
+
+    async def _refresh_rates(self) -> RateSnapshot:
+        # another host may have refreshed the rates already
+        shared = await self.shared_snapshot.get(RATES_CACHE_KEY)
+        current = self.rate_table.snapshot
+        if (
+            shared is not None
+            and shared.age < currency_api_settings.RATES_REFRESH_INTERVAL
+            and (current is None or shared.captured_at > current.captured_at)
+        ):
+            # persisted by the host that fetched it
+            return self.rate_table.publish(
+                shared.prices(), captured_at=shared.captured_at, adopted=True
+            )
+
+        catalog = await self.get_catalog()
+        prices = await self.fetch_prices(catalog)
+        snapshot = self.rate_table.publish(prices)
+        await self.shared_snapshot.set(RATES_CACHE_KEY, snapshot)
+        return snapshot
+
+    def _on_rates_refreshed(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Rates refresh failed: %r", task.exception())
+
+    async def _fetch_ticker_prices(self, ids: List[str]) -> dict[str, float]:
+        tickers = await self.providers.fetch_tickers(ids)
+
+        prices: dict[str, float] = {}
+        for ticker in tickers:
+            price = float(ticker["price_usd"] or 0)
+            if price > 0:
+                prices[str(ticker["id"])] = price
+        return prices
@@ -0,0 +1,240 @@
+import asyncio
+import bisect
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Sequence, TypeVar
+from urllib.parse import urlsplit
+
+from httpx import AsyncClient
+
+from src.core.config import currency_api_settings
+from src.core.http import get_json
+from src.exceptions.services import UpstreamUnavailableException
+from src.utils.circuit_breaker import CircuitBreaker, CircuitState
+
+R = TypeVar("R")
+
+
+class RateProvider(ABC):
+    """Source of the Coinlore-shaped /tickers/ and /ticker/ payloads"""
+
+    name: str
+
+    @abstractmethod
+    async def fetch_tickers_page(self, start: int, limit: int) -> dict:
+        """One page of the listing, ``{"data": [...], "info": {...}}``"""
+
+    @abstractmethod
+    async def fetch_tickers(self, ids: List[str]) -> list[dict]:
+        """Tickers with ``price_usd`` for the given ids"""
+
+
+class CoinloreProvider(RateProvider):
+    def __init__(self, name: str, api_url: str, async_client: AsyncClient):
+        self.name = name
+        self.api_url = api_url.rstrip("/")
+        self.async_client = async_client
+
+    async def fetch_tickers_page(self, start: int, limit: int) -> dict:
+        page = await get_json(
+            self.async_client,
+            url=f"{self.api_url}/tickers/",
+            params={"start": start, "limit": limit},
+        )
+        if not isinstance(page, dict) or not isinstance(
+            page.get("data"), list
+        ):
+            raise ValueError(f"Malformed /tickers/ page from {self.name}")
+        return page
+
+    async def fetch_tickers(self, ids: List[str]) -> list[dict]:
+        tickers = await get_json(
+            self.async_client,
+            url=f"{self.api_url}/ticker/",
+            params={"id": ",".join(ids)},
+        )
+        if not isinstance(tickers, list):
+            raise ValueError(f"Malformed /ticker/ payload from {self.name}")
+        return tickers
+
+
+class LatencyHistogram:
+    """Latency counts in log-spaced buckets from 1 ms to about 60 s
+
+    Counts are halved once ``window`` samples are reached, so quantiles
+    follow the recent behaviour of the provider.
+    """
+
+    BOUNDS = tuple(0.001 * 1.25**i for i in range(50))
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.total = 0
+        self._counts = [0] * (len(self.BOUNDS) + 1)
+
+    def record(self, seconds: float) -> None:
+        self._counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += 1
+        if self.total >= self.window:
+            self._counts = [count // 2 for count in self._counts]
+            self.total = sum(self._counts)
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.total:
+            return None
+
+        rank = q * self.total
+        seen = 0
+        for position, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count:
+                return self.BOUNDS[min(position, len(self.BOUNDS) - 1)]
+        return self.BOUNDS[-1]
+
+
+class ProviderSlot:
+    def __init__(
+        self,
+        provider: RateProvider,
+        breaker: CircuitBreaker,
+        hedge_quantile: float,
+        min_hedge_delay: float,
+        max_hedge_delay: float,
+    ):
+        self.provider = provider
+        self.breaker = breaker
+        self.latency = LatencyHistogram()
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+
+    @property
+    def hedge_delay(self) -> float:
+        """How long to wait for this provider before asking the next one"""
+        observed = self.latency.quantile(self.hedge_quantile)
+        if observed is None:
+            return self.max_hedge_delay
+        return min(max(observed, self.min_hedge_delay), self.max_hedge_delay)
+
+    async def call(self, request: Callable[[RateProvider], Awaitable[R]]) -> R:
+        started_at = time.perf_counter()
+        try:
+            result = await self.breaker.call(request, self.provider)
+        except asyncio.CancelledError:
+            # a cancelled loser was at least this slow
+            self.latency.record(time.perf_counter() - started_at)
+            raise
+        self.latency.record(time.perf_counter() - started_at)
+        return result
+
+
+class ProviderPool(RateProvider):
+    """Asks the providers in order, hedging the ones slower than usual
+
+    A provider that has not answered within the ``hedge_quantile`` of its
+    own latency gets a backup request to the next provider. The first
+    valid answer wins and the remaining requests are cancelled. A provider
+    that fails is skipped at once, one with an open breaker is not asked.
+    """
+
+    name = "pool"
+
+    def __init__(
+        self,
+        providers: Sequence[RateProvider],
+        failure_threshold: int,
+        reset_timeout: float,
+        hedge_quantile: float = 0.95,
+        min_hedge_delay: float = 0.05,
+        max_hedge_delay: float = 2.0,
+    ):
+        if not providers:
+            raise ValueError("At least one rate provider is required")
+
+        self.slots = [
+            ProviderSlot(
+                provider,
+                CircuitBreaker(failure_threshold, reset_timeout),
+                hedge_quantile,
+                min_hedge_delay,
+                max_hedge_delay,
+            )
+            for provider in providers
+        ]
+
+    async def fetch_tickers_page(self, start: int, limit: int) -> dict:
+        return await self._call(
+            lambda provider: provider.fetch_tickers_page(start, limit)
+        )
+
+    async def fetch_tickers(self, ids: List[str]) -> list[dict]:
+        return await self._call(lambda provider: provider.fetch_tickers(ids))
+
+    async def _call(
+        self, request: Callable[[RateProvider], Awaitable[R]]
+    ) -> R:
+        slots = [
+            slot
+            for slot in self.slots
+            if slot.breaker.state is not CircuitState.OPEN
+        ]
+        if not slots:
+            raise UpstreamUnavailableException(
+                "Currency providers are unavailable, retry later"
+            )
+
+        pending: set[asyncio.Task] = set()
+        error: BaseException | None = None
+        try:
+            for position, slot in enumerate(slots):
+                task = asyncio.ensure_future(slot.call(request))
+                task.add_done_callback(_retrieve_exception)
+                pending.add(task)
+                is_last = position == len(slots) - 1
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        timeout=None if is_last else slot.hedge_delay,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done:
+                        # too slow, hedge with the next provider
+                        break
+
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        error = task.exception()
+                    if not is_last:
+                        # failed, move on without waiting for the rest
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error
+
+
+def create_provider_pool(async_client: AsyncClient) -> ProviderPool:
+    api_urls = [
+        currency_api_settings.API_URL,
+        *currency_api_settings.FALLBACK_API_URLS,
+    ]
+    return ProviderPool(
+        [
+            CoinloreProvider(urlsplit(api_url).netloc, api_url, async_client)
+            for api_url in api_urls
+        ],
+        failure_threshold=currency_api_settings.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=currency_api_settings.BREAKER_RESET_TIMEOUT,
+        hedge_quantile=currency_api_settings.HEDGE_QUANTILE,
+        min_hedge_delay=currency_api_settings.HEDGE_MIN_DELAY,
+        max_hedge_delay=currency_api_settings.HEDGE_MAX_DELAY,
+    )
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # cancelled losers may still fail, that is not worth a warning
+    if not task.cancelled():
+        task.exception()
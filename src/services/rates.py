@@ -0,0 +1,402 @@
+import asyncio
+import datetime
+import logging
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, List, Mapping, Sequence
+
+import numpy as np
+import orjson
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.utils.cache import CacheCodec, LRUCache
+from src.utils.unit_of_work import IUnitOfWork, UnitOfWork
+
+if TYPE_CHECKING:
+    from src.services.converter import ConverterService
+
+logger = logging.getLogger(__name__)
+
+
+class RateSnapshot:
+    """USD prices as a read-only float64 vector indexed by symbol"""
+
+    __slots__ = ("version", "symbols", "index", "vector", "captured_at")
+
+    def __init__(
+        self,
+        version: int,
+        symbols: Sequence[str],
+        vector: np.ndarray,
+        captured_at: float | None = None,
+    ):
+        self.version = version
+        self.symbols = tuple(symbols)
+        self.index: Mapping[str, int] = MappingProxyType(
+            {symbol: position for position, symbol in enumerate(self.symbols)}
+        )
+        self.vector = np.asarray(vector, dtype=np.float64)
+        self.vector.flags.writeable = False
+        self.captured_at = time.time() if captured_at is None else captured_at
+
+    @classmethod
+    def from_prices(
+        cls,
+        version: int,
+        prices: Mapping[str, float],
+        captured_at: float | None = None,
+    ) -> "RateSnapshot":
+        vector = np.fromiter(
+            prices.values(), dtype=np.float64, count=len(prices)
+        )
+        return cls(version, tuple(prices), vector, captured_at)
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.captured_at)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def positions(self, symbols: Sequence[str]) -> np.ndarray:
+        return np.fromiter(
+            (self.index[symbol] for symbol in symbols),
+            dtype=np.intp,
+            count=len(symbols),
+        )
+
+    def convert(
+        self, from_symbol: str, to_symbols: Sequence[str], amount: float
+    ) -> np.ndarray:
+        base_value = self.vector[self.index[from_symbol]] * amount
+        return base_value / self.vector[self.positions(to_symbols)]
+
+    def cross_rates(self, symbols: Sequence[str]) -> np.ndarray:
+        """matrix[i, j] is how many units of symbols[j] one symbols[i] buys"""
+        prices = self.vector[self.positions(symbols)]
+        return prices[:, np.newaxis] / prices[np.newaxis, :]
+
+    def prices(self) -> dict[str, float]:
+        return dict(zip(self.symbols, self.vector.tolist()))
+
+    def changed_since(
+        self, previous: "RateSnapshot | None"
+    ) -> dict[str, float]:
+        """Prices that are new or differ from the previous snapshot"""
+        if previous is None:
+            return self.prices()
+
+        if previous.symbols == self.symbols:
+            positions = np.flatnonzero(previous.vector != self.vector)
+        else:
+            # the ticker set changed, compare by symbol
+            old_prices = previous.prices()
+            positions = [
+                position
+                for position, symbol in enumerate(self.symbols)
+                if old_prices.get(symbol) != self.vector[position]
+            ]
+        return {
+            self.symbols[position]: float(self.vector[position])
+            for position in positions
+        }
+
+
+def _encode_snapshot(snapshot: RateSnapshot) -> bytes:
+    return orjson.dumps(
+        {
+            "captured_at": snapshot.captured_at,
+            "symbols": snapshot.symbols,
+            "prices": snapshot.vector,
+        },
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def _decode_snapshot(data: bytes) -> RateSnapshot:
+    snapshot = orjson.loads(data)
+    return RateSnapshot(
+        0,
+        snapshot["symbols"],
+        np.array(snapshot["prices"], dtype=np.float64),
+        snapshot["captured_at"],
+    )
+
+
+SNAPSHOT_CODEC = CacheCodec(encode=_encode_snapshot, decode=_decode_snapshot)
+
+
+class PairRateCache:
+    """Units of ``to`` one ``from`` buys, for the recently used pairs
+
+    Ratios belong to the snapshot last seen by ``update``. A new snapshot
+    only recomputes the cached pairs with a changed leg, so a conversion
+    on the live snapshot is a lookup and a multiplication.
+    """
+
+    def __init__(self, maxsize: int):
+        self.snapshot: RateSnapshot | None = None
+        self.hits = 0
+        self.misses = 0
+        self._ratios: LRUCache[tuple[str, str], float] = LRUCache(maxsize)
+
+    def __len__(self) -> int:
+        return len(self._ratios)
+
+    @property
+    def hit_ratio(self) -> float | None:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def get_many(
+        self, snapshot: RateSnapshot, from_symbol: str, to_symbols: List[str]
+    ) -> List[float] | None:
+        """Ratios for the pairs, None when the snapshot is not the live one"""
+        if snapshot is not self.snapshot:
+            return None
+
+        ratios = []
+        for to_symbol in to_symbols:
+            key = (from_symbol, to_symbol)
+            ratio = self._ratios.get(key)
+            if ratio is None:
+                self.misses += 1
+                ratio = self._compute(snapshot, key)
+                self._ratios.set(key, ratio)
+            else:
+                self.hits += 1
+            ratios.append(ratio)
+        return ratios
+
+    def update(self, snapshot: RateSnapshot) -> None:
+        previous, self.snapshot = self.snapshot, snapshot
+        if previous is None:
+            self._ratios.clear()
+            return
+
+        changed = snapshot.changed_since(previous)
+        if not changed and previous.symbols == snapshot.symbols:
+            return
+
+        for key, _ in self._ratios.items():
+            from_symbol, to_symbol = key
+            if from_symbol not in snapshot.index or (
+                to_symbol not in snapshot.index
+            ):
+                self._ratios.invalidate(key)
+            elif from_symbol in changed or to_symbol in changed:
+                self._ratios.replace(key, self._compute(snapshot, key))
+
+    @staticmethod
+    def _compute(snapshot: RateSnapshot, key: tuple[str, str]) -> float:
+        from_symbol, to_symbol = key
+        return float(
+            snapshot.vector[snapshot.index[from_symbol]]
+            / snapshot.vector[snapshot.index[to_symbol]]
+        )
+
+
+class RateTable:
+    def __init__(self):
+        self._snapshot: RateSnapshot | None = None
+        self._version = 0
+        self._ready = asyncio.Event()
+        # (listener, called for adopted snapshots)
+        self._listeners: list[tuple[Callable[[RateSnapshot], None], bool]] = []
+
+    @property
+    def snapshot(self) -> RateSnapshot | None:
+        return self._snapshot
+
+    def add_listener(
+        self, listener: Callable[[RateSnapshot], None], adopted: bool = True
+    ) -> None:
+        """``adopted=False`` skips snapshots another worker or host fetched"""
+        self._listeners.append((listener, adopted))
+
+    def publish(
+        self,
+        prices: Mapping[str, float],
+        captured_at: float | None = None,
+        adopted: bool = False,
+    ) -> RateSnapshot:
+        return self.publish_snapshot(
+            RateSnapshot.from_prices(self._version + 1, prices, captured_at),
+            adopted=adopted,
+        )
+
+    def publish_snapshot(
+        self, snapshot: RateSnapshot, adopted: bool = False
+    ) -> RateSnapshot:
+        self._version = snapshot.version
+        self._snapshot = snapshot
+        self._ready.set()
+
+        for listener, wants_adopted in self._listeners:
+            if adopted and not wants_adopted:
+                continue
+            try:
+                listener(snapshot)
+            except Exception:
+                logger.exception("Rate snapshot listener %r failed", listener)
+        return snapshot
+
+    async def wait_ready(self, timeout: float) -> RateSnapshot | None:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._snapshot
+
+
+class RateRefresher:
+    def __init__(self, converter_service: "ConverterService", interval: float):
+        self.converter_service = converter_service
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def refresh(self) -> RateSnapshot:
+        return await self.converter_service.refresh_rates()
+
+    async def _run(self) -> None:
+        while True:
+            started_at = time.monotonic()
+            try:
+                snapshot = await self.refresh()
+                logger.debug(
+                    "Published rate snapshot v%s with %s prices",
+                    snapshot.version,
+                    len(snapshot),
+                )
+            except Exception:
+                logger.exception("Failed to refresh currency rates")
+
+            elapsed = time.monotonic() - started_at
+            await asyncio.sleep(max(0.0, self.interval - elapsed))
+
+
+class SnapshotRecorder:
+    """Persists published snapshots from a bounded queue in the background"""
+
+    def __init__(self, uow: IUnitOfWork, queue_size: int):
+        self.uow = uow
+        self._queue: asyncio.Queue[RateSnapshot] = asyncio.Queue(queue_size)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def submit(self, snapshot: RateSnapshot) -> None:
+        if self._queue.full():
+            dropped = self._queue.get_nowait()
+            logger.warning(
+                "Database is behind, rate snapshot v%s is not persisted",
+                dropped.version,
+            )
+        self._queue.put_nowait(snapshot)
+
+    async def record(self, snapshot: RateSnapshot) -> int:
+        captured_at = datetime.datetime.fromtimestamp(
+            snapshot.captured_at, tz=datetime.timezone.utc
+        )
+        async with self.uow as uow:
+            rows = await uow.rate_snapshot.add_snapshot(
+                captured_at, snapshot.symbols, snapshot.vector.tolist()
+            )
+            await uow.commit()
+        return rows
+
+    async def _run(self) -> None:
+        while True:
+            snapshot = await self._queue.get()
+            try:
+                await self.record(snapshot)
+            except Exception:
+                logger.exception(
+                    "Failed to persist rate snapshot v%s", snapshot.version
+                )
+
+
+class RateHistory:
+    """Point-in-time snapshots read from the database through an LRU cache
+
+    Every lookup opens its own unit of work, so concurrent misses do not
+    share a session.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker, cache_size: int):
+        self.session_maker = session_maker
+        # captured_at -> (valid_until, snapshot)
+        self._cache: LRUCache[float, tuple[float, RateSnapshot]] = LRUCache(
+            cache_size
+        )
+
+    async def get_snapshot_at(
+        self, at: datetime.datetime
+    ) -> RateSnapshot | None:
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=datetime.timezone.utc)
+
+        timestamp = at.timestamp()
+        for captured_at, (valid_until, snapshot) in self._cache.items():
+            if captured_at <= timestamp < valid_until:
+                self._cache.get(captured_at)
+                return snapshot
+
+        queried_at = time.time()
+        async with UnitOfWork(self.session_maker) as uow:
+            rows = await uow.rate_snapshot.get_snapshot_at(at)
+            if not rows:
+                return None
+
+            captured_at = rows[0][0]
+            next_captured_at = await uow.rate_snapshot.get_next_capture_time(
+                captured_at
+            )
+
+        snapshot = RateSnapshot(
+            version=0,
+            symbols=[symbol for _, symbol, _ in rows],
+            vector=np.fromiter(
+                (price for _, _, price in rows),
+                dtype=np.float64,
+                count=len(rows),
+            ),
+            captured_at=captured_at.timestamp(),
+        )
+        # the latest stored snapshot only answers for instants that were
+        # already in the past when it was looked up
+        valid_until = (
+            next_captured_at.timestamp()
+            if next_captured_at is not None
+            else queried_at
+        )
+        self._cache.set(snapshot.captured_at, (valid_until, snapshot))
+        return snapshot
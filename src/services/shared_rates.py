@@ -0,0 +1,274 @@
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+import tempfile
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import IO, Callable
+
+import numpy as np
+
+from src.services.rates import RateRefresher, RateSnapshot, RateTable
+
+logger = logging.getLogger(__name__)
+
+# sequence, version, captured_at, count, symbols epoch, symbols size
+HEADER = struct.Struct("<QQdQQQ")
+SEQUENCE = struct.Struct("<Q")
+HEADER_SIZE = 64
+SYMBOL_BYTES = 16
+READ_ATTEMPTS = 16
+
+
+class SharedRateSegment:
+    """Latest rate snapshot in a shared memory segment guarded by a seqlock
+
+    The writer makes the sequence odd while it updates the segment and
+    even again when done. Readers never block the writer, they retry when
+    the sequence was odd or moved during their read. The symbols are only
+    rewritten when they change, and each reader decodes them once per
+    change. Readers copy the price vector once per version because
+    snapshots outlive the slot the writer reuses.
+
+    A segment left smaller by a deploy with a lower capacity is not used
+    until the writer replaces it, see ``attach``.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self._symbols_capacity = capacity * SYMBOL_BYTES
+        self._vector_offset = HEADER_SIZE + self._symbols_capacity
+        self._size = self._vector_offset + capacity * 8
+        self._shm: SharedMemory | None = None
+        self._vector: np.ndarray | None = None
+        self._written_symbols: tuple[str, ...] | None = None
+        # epoch -> symbols decoded by this reader
+        self._read_symbols: tuple[int, tuple[str, ...]] | None = None
+        self.attach()
+
+    def attach(self, replace_smaller: bool = False) -> bool:
+        """Map the segment, the writer may replace one that is too small"""
+        if self._shm is not None:
+            return True
+
+        shm = _open_segment(self.name, self._size, replace_smaller)
+        if shm is None:
+            return False
+        self._shm = shm
+        self._vector = np.ndarray(
+            (self.capacity,),
+            dtype=np.float64,
+            buffer=shm.buf,
+            offset=self._vector_offset,
+        )
+        return True
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+
+        # the buffer cannot be released while a view of it exists
+        self._vector = None
+        self._shm.close()
+        self._shm = None
+
+    def write(self, snapshot: RateSnapshot) -> None:
+        if not self.attach(replace_smaller=True):
+            raise ValueError(
+                f"Shared memory segment {self.name!r} is too small"
+            )
+
+        count = len(snapshot)
+        if count > self.capacity:
+            raise ValueError(
+                f"{count} rates do not fit the shared segment of "
+                f"{self.capacity}"
+            )
+
+        buf = self._shm.buf
+        sequence, _, _, _, epoch, symbols_size = HEADER.unpack_from(buf)
+        blob = None
+        if snapshot.symbols != self._written_symbols:
+            blob = "\n".join(snapshot.symbols).encode()
+            if len(blob) > self._symbols_capacity:
+                raise ValueError("Symbols do not fit the shared segment")
+
+        # a writer that died mid-write leaves the sequence odd
+        sequence |= 1
+        SEQUENCE.pack_into(buf, 0, sequence)
+        if blob is not None:
+            buf[HEADER_SIZE : HEADER_SIZE + len(blob)] = blob
+            epoch += 1
+            symbols_size = len(blob)
+            self._written_symbols = snapshot.symbols
+        self._vector[:count] = snapshot.vector
+        HEADER.pack_into(
+            buf,
+            0,
+            sequence,
+            snapshot.version,
+            snapshot.captured_at,
+            count,
+            epoch,
+            symbols_size,
+        )
+        SEQUENCE.pack_into(buf, 0, sequence + 1)
+
+    def read(self, known_version: int | None = None) -> RateSnapshot | None:
+        """The stored snapshot, None if it is empty, busy or known_version"""
+        if not self.attach():
+            return None
+
+        buf = self._shm.buf
+        for _ in range(READ_ATTEMPTS):
+            sequence, version, captured_at, count, epoch, symbols_size = (
+                HEADER.unpack_from(buf)
+            )
+            if sequence % 2:
+                continue
+            if sequence == 0 or version == known_version:
+                return None
+
+            blob = None
+            if self._read_symbols is None or self._read_symbols[0] != epoch:
+                blob = bytes(buf[HEADER_SIZE : HEADER_SIZE + symbols_size])
+            vector = self._vector[:count].copy()
+
+            # a torn blob must not be decoded
+            if SEQUENCE.unpack_from(buf)[0] != sequence:
+                continue
+            if blob is not None:
+                symbols = tuple(blob.decode().split("\n")) if blob else ()
+                self._read_symbols = epoch, symbols
+            symbols = self._read_symbols[1]
+            return RateSnapshot(version, symbols, vector, captured_at)
+        return None
+
+
+class SharedRateSync:
+    """Shares the rates refreshed by one worker with the others of the host
+
+    The worker holding the lock file runs the refresher and writes every
+    snapshot to the segment, the others publish what they read from it to
+    their own rate table and never poll upstream. When the leader stops,
+    the lock is released and the next follower to poll takes over.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        rate_table: RateTable,
+        refresher: RateRefresher,
+        poll_interval: float,
+    ):
+        self.rate_table = rate_table
+        self.refresher = refresher
+        self.poll_interval = poll_interval
+        self.segment = SharedRateSegment(name, capacity)
+        self.is_leader = False
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_file: IO | None = None
+        self._listeners: list[Callable[[RateSnapshot], None]] = []
+        self._task: asyncio.Task | None = None
+
+    def add_listener(self, listener: Callable[[RateSnapshot], None]) -> None:
+        """Called for the snapshots refreshed by this worker only"""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        if self._task is None:
+            self.rate_table.add_listener(self._on_published)
+            self.rate_table.add_listener(self._on_refreshed, adopted=False)
+            # decide leadership before the first request is served
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to read the shared rates")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.is_leader = False
+        self.segment.close()
+
+    def poll(self) -> None:
+        if not self.is_leader and self._acquire_lock():
+            self.is_leader = True
+            self.segment.attach(replace_smaller=True)
+            logger.info("Refreshing the shared rates %r", self.segment.name)
+            self.refresher.start()
+        self.refresher.converter_service.follow_shared_rates = (
+            not self.is_leader
+        )
+        if self.is_leader:
+            return
+
+        current = self.rate_table.snapshot
+        snapshot = self.segment.read(current.version if current else None)
+        if snapshot is not None:
+            self.rate_table.publish_snapshot(snapshot, adopted=True)
+
+    def _acquire_lock(self) -> bool:
+        if self._lock_file is None:
+            self._lock_file = open(self._lock_path, "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _on_published(self, snapshot: RateSnapshot) -> None:
+        if self.is_leader:
+            self.segment.write(snapshot)
+
+    def _on_refreshed(self, snapshot: RateSnapshot) -> None:
+        if not self.is_leader:
+            return
+
+        for listener in self._listeners:
+            listener(snapshot)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to read the shared rates")
+
+
+def _open_segment(
+    name: str, size: int, replace_smaller: bool
+) -> SharedMemory | None:
+    try:
+        shm = SharedMemory(name, create=True, size=size)
+    except FileExistsError:
+        shm = SharedMemory(name)
+        if shm.size < size:
+            if not replace_smaller:
+                shm.close()
+                return None
+            logger.info("Replacing the smaller shared segment %r", name)
+            shm.unlink()
+            shm.close()
+            return _open_segment(name, size, replace_smaller=False)
+    # the segment outlives the worker that created it, it must not be
+    # unlinked by the resource tracker when that worker exits
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Iterable, NamedTuple
+
+from src.services.rates import RateSnapshot
+
+
+class RateUpdate(NamedTuple):
+    version: int
+    rates: dict[str, float]
+
+
+class RateSubscription:
+    """Bounded buffer of rate updates for the symbols of one client
+
+    When the client falls ``buffer_size`` updates behind, the buffered
+    updates are merged into one, so a slow client gets fewer, larger
+    messages instead of holding up the broadcaster.
+    """
+
+    def __init__(self, symbols: Iterable[str], buffer_size: int):
+        self.symbols = tuple(symbols)
+        self.closed = False
+        self.conflated = 0
+        self._queue: asyncio.Queue[RateUpdate | None] = asyncio.Queue(
+            buffer_size
+        )
+
+    def push(self, update: RateUpdate) -> None:
+        if self.closed:
+            return
+
+        if self._queue.full():
+            rates: dict[str, float] = {}
+            while not self._queue.empty():
+                rates.update(self._queue.get_nowait().rates)
+            rates.update(update.rates)
+            update = RateUpdate(update.version, rates)
+            self.conflated += 1
+        self._queue.put_nowait(update)
+
+    async def get(self, timeout: float) -> RateUpdate | None:
+        """Wait for the next update, None on timeout or once closed"""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+
+class RateBroadcaster:
+    """Fans every published snapshot out to the subscribed clients
+
+    The changed prices are computed once per snapshot, each subscription
+    then only picks its own symbols, so no client ever reaches upstream.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._snapshot: RateSnapshot | None = None
+        self._subscriptions: set[RateSubscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, symbols: Iterable[str]) -> RateSubscription:
+        subscription = RateSubscription(symbols, self.buffer_size)
+        self._subscriptions.add(subscription)
+
+        snapshot = self._snapshot
+        if snapshot is not None:
+            rates = {
+                symbol: float(snapshot.vector[snapshot.index[symbol]])
+                for symbol in subscription.symbols
+                if symbol in snapshot.index
+            }
+            if rates:
+                subscription.push(RateUpdate(snapshot.version, rates))
+        return subscription
+
+    def unsubscribe(self, subscription: RateSubscription) -> None:
+        self._subscriptions.discard(subscription)
+        subscription.close()
+
+    def close(self) -> None:
+        for subscription in self._subscriptions:
+            subscription.close()
+        self._subscriptions.clear()
+
+    def publish(self, snapshot: RateSnapshot) -> None:
+        previous, self._snapshot = self._snapshot, snapshot
+        changed = snapshot.changed_since(previous)
+        if not changed:
+            return
+
+        for subscription in self._subscriptions:
+            rates = _pick(subscription.symbols, changed)
+            if rates:
+                subscription.push(RateUpdate(snapshot.version, rates))
+
+
+def _pick(
+    symbols: tuple[str, ...], prices: dict[str, float]
+) -> dict[str, float]:
+    return {symbol: prices[symbol] for symbol in symbols if symbol in prices}
@@ -9,21 +9,34 @@ from src.api.schemas.user import (
     UserReturnSchema,
     UserUpdateSchema,
 )
+from src.core.security import VerifiedTokenCache
 from src.db.database import Base
 from src.db.models import User
 from src.exceptions.services import UserAlreadyExistsException
+from src.utils.cache import CacheNamespace, model_codec
 from src.utils.password import PasswordHasher
 from src.utils.unit_of_work import IUnitOfWork
 
+USER_CODEC = model_codec(UserReturnSchema)
+
 
 class UserService:
-    def __init__(self, uow: IUnitOfWork):
+    def __init__(
+        self,
+        uow: IUnitOfWork,
+        cache: CacheNamespace[UserReturnSchema] | None = None,
+        token_cache: VerifiedTokenCache | None = None,
+    ):
         self.uow = uow
+        self.cache = cache
+        self.token_cache = token_cache
 
     async def add_user(self, user: UserRegisterSchema) -> UserReturnSchema:
         where_clauses = self._build_get_filter_by_email_or_username(
             User, UserFilter(email=user.email, username=user.username)
         )
+        # hashed before the session is opened, bcrypt is slow
+        hashed_password = await PasswordHasher.hash_async(user.password)
         async with self.uow as uow:
             result = await uow.user.get_user_by_expression(where_clauses)
             if result:
@@ -34,7 +47,7 @@ class UserService:
 
             user_data = {
                 **user.model_dump(exclude={"password"}),
-                "hashed_password": PasswordHasher.hash(user.password),
+                "hashed_password": hashed_password,
             }
             new_user = await uow.user.add_user(user_data)
             await uow.commit()
@@ -43,11 +56,11 @@ class UserService:
             )
 
     async def get_user(self, email: str) -> UserReturnSchema | None:
-        async with self.uow as uow:
-            if user := await uow.user.get_user({"email": email}):
-                return UserReturnSchema.model_validate(
-                    user, from_attributes=True
-                )
+        if self.cache is None:
+            return await self._fetch_user(email)
+        return await self.cache.get_or_load(
+            email, lambda: self._fetch_user(email)
+        )
 
     async def update_user(
         self, user_id: UUID, profile_data: UserUpdateSchema
@@ -58,20 +71,37 @@ class UserService:
                 values=profile_data.model_dump(exclude_unset=True),
             )
             await uow.commit()
-            return UserReturnSchema.model_validate(
+            result = UserReturnSchema.model_validate(
                 updated_user, from_attributes=True
             )
 
+        if self.cache is not None:
+            await self.cache.invalidate(result.email)
+        return result
+
     async def delete_user(self, username: str) -> bool:
         async with self.uow as uow:
-            is_result = await uow.user.delete_user(User.username == username)
-            if is_result:
-                await self.uow.jwt_token.revoke_tokens(
-                    filters={"username": username}
-                )
+            user = await uow.user.get_user({"username": username})
+            if user is None:
+                return False
 
+            email = user.email
+            # the user's jwttokens rows go with it, ON DELETE CASCADE
+            is_result = await uow.user.delete_user(User.username == username)
             await uow.commit()
-            return is_result
+
+        if self.cache is not None:
+            await self.cache.invalidate(email)
+        if self.token_cache is not None:
+            self.token_cache.evict_subject(email)
+        return is_result
+
+    async def _fetch_user(self, email: str) -> UserReturnSchema | None:
+        async with self.uow as uow:
+            if user := await uow.user.get_user({"email": email}):
+                return UserReturnSchema.model_validate(
+                    user, from_attributes=True
+                )
 
     def _build_get_filter_by_email_or_username(
         self, model: Type[Base], where_clauses: dict, operand: Callable = or_
@@ -0,0 +1,103 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Iterable, Mapping, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class RequestCoalescer(Generic[K, V]):
+    """Merges the keys requested within ``window`` seconds into one fetch
+
+    Every caller waits for the merged fetch and gets back only the keys it
+    asked for. Keys missing from the fetch result are left out. Merged keys
+    are split into chunks of ``max_batch`` fetched with at most
+    ``concurrency`` calls at a time.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+        window: float,
+        max_batch: int,
+        concurrency: int = 1,
+    ):
+        self.fetch = fetch
+        self.window = window
+        self.max_batch = max_batch
+        self.concurrency = concurrency
+        self.fetch_count = 0
+        self._pending: dict[K, asyncio.Future] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, keys: Iterable[K]) -> dict[K, V]:
+        loop = asyncio.get_running_loop()
+        futures: dict[K, asyncio.Future] = {}
+        for key in keys:
+            if key in futures:
+                continue
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = loop.create_future()
+            futures[key] = future
+
+        if self._pending and self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush())
+            self._tasks.add(self._flush_task)
+            self._flush_task.add_done_callback(self._tasks.discard)
+
+        # a cancelled caller must not fail the batch for other waiters
+        results = await asyncio.gather(
+            *(asyncio.shield(future) for future in futures.values()),
+            return_exceptions=True,
+        )
+        values = {}
+        for key, result in zip(futures, results):
+            if isinstance(result, BaseException):
+                raise result
+            found, value = result
+            if found:
+                values[key] = value
+        return values
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _flush(self) -> None:
+        batch: dict[K, asyncio.Future] = {}
+        try:
+            await asyncio.sleep(self.window)
+            batch, self._pending = self._pending, {}
+            self._flush_task = None
+            await self._fetch_batch(batch)
+        finally:
+            if self._flush_task is asyncio.current_task():
+                batch, self._pending = self._pending, {}
+                self._flush_task = None
+            # waiters of an interrupted batch are cancelled with it
+            for future in batch.values():
+                future.cancel()
+
+    async def _fetch_batch(self, batch: dict[K, asyncio.Future]) -> None:
+        keys = list(batch)
+        chunks = [
+            keys[start : start + self.max_batch]
+            for start in range(0, len(keys), self.max_batch)
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(chunk: list[K]) -> None:
+            try:
+                async with semaphore:
+                    self.fetch_count += 1
+                    values = await self.fetch(chunk)
+            except Exception as e:
+                for key in chunk:
+                    batch[key].set_exception(e)
+            else:
+                for key in chunk:
+                    batch[key].set_result((key in values, values.get(key)))
+
+        await asyncio.gather(*(fetch(chunk) for chunk in chunks))
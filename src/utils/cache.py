@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Iterator,
+    NamedTuple,
+    TypeVar,
+)
+
+from pydantic import BaseModel
+
+from src.utils.cache_backends import CacheBackend, CacheBackendError
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BACKEND_ERRORS = (CacheBackendError, OSError, EOFError, asyncio.TimeoutError)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache(Generic[K, V]):
+    """TTL cache where concurrent misses for a key share one load call
+
+    For ``stale_ttl`` seconds after expiry an entry is still returned by
+    ``get_or_load`` while a reload runs in the background.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # key -> (fresh until, usable until, value)
+        self._data: dict[K, tuple[float, float, V]] = {}
+        self._inflight: dict[K, asyncio.Task] = {}
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        fresh_until, stale_until, value = entry
+        now = time.monotonic()
+        if stale_until <= now:
+            del self._data[key]
+        if fresh_until <= now:
+            return None
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        fresh_until = time.monotonic() + self.ttl
+        self._data[key] = (fresh_until, fresh_until + self.stale_ttl, value)
+
+    def invalidate(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    async def close(self) -> None:
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_or_load(
+        self, key: K, loader: Callable[[], Awaitable[V]]
+    ) -> V:
+        entry = self._data.get(key)
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            now = time.monotonic()
+            if now < fresh_until:
+                return value
+            if now < stale_until:
+                self._load(key, loader)
+                return value
+
+        # a cancelled caller must not cancel the load for other waiters
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(
+        self, key: K, loader: Callable[[], Awaitable[V]]
+    ) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            task.add_done_callback(lambda t: self._on_loaded(key, t))
+            self._inflight[key] = task
+        return task
+
+    def _on_loaded(self, key: K, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+
+class LRUCache(Generic[K, V]):
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def get(self, key: K) -> V | None:
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def replace(self, key: K, value: V) -> None:
+        """Update a cached value without marking it as recently used"""
+        if key in self._data:
+            self._data[key] = value
+
+    def invalidate(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """Iterate from the least to the most recently used entry"""
+        return iter(list(self._data.items()))
+
+
+class CacheCodec(NamedTuple):
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+def model_codec(model: type[BaseModel]) -> CacheCodec:
+    return CacheCodec(
+        encode=lambda value: value.model_dump_json().encode(),
+        decode=model.model_validate_json,
+    )
+
+
+class CacheNamespace(Generic[V]):
+    """Values of one kind with their own TTL and local size bound
+
+    Reads go to the worker-local LRU first, then to the shared backend.
+    An invalidation reaches the other workers' local entries only when
+    they expire, so ``ttl`` bounds how stale they may get. Backend
+    failures count as misses, the cache never fails a request.
+
+    Concurrent misses for a key share one load, and a load that overlaps
+    an invalidation is returned but not cached. Callers arriving after an
+    invalidation never join a load started before it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        maxsize: int,
+        codec: CacheCodec,
+        backend: CacheBackend | None = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.codec = codec
+        self.backend = backend
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        # key -> (expires at, value)
+        self._local: LRUCache[str, tuple[float, V]] = LRUCache(maxsize)
+        # key -> (invalidations when started, load)
+        self._loads: dict[str, tuple[int, asyncio.Task]] = {}
+        self._invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    @property
+    def hit_ratio(self) -> float | None:
+        lookups = self.hits + self.backend_hits + self.misses
+        if not lookups:
+            return None
+        return (self.hits + self.backend_hits) / lookups
+
+    async def get(self, key: str) -> V | None:
+        entry = self._local.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self._local.invalidate(key)
+
+        if self.backend is not None:
+            try:
+                data = await self.backend.get(self._backend_key(key))
+            except BACKEND_ERRORS as e:
+                logger.warning("Cache backend get failed: %r", e)
+                data = None
+            if data is not None:
+                try:
+                    value = self.codec.decode(data)
+                except Exception as e:
+                    # written by another version or corrupt, load it anew
+                    logger.warning(
+                        "Cache entry %r cannot be decoded: %r", key, e
+                    )
+                    await self._delete_backend(key)
+                else:
+                    self._set_local(key, value)
+                    self.backend_hits += 1
+                    return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: V) -> None:
+        self._set_local(key, value)
+        if self.backend is not None:
+            try:
+                await self.backend.set(
+                    self._backend_key(key), self.codec.encode(value), self.ttl
+                )
+            except BACKEND_ERRORS as e:
+                logger.warning("Cache backend set failed: %r", e)
+
+    async def invalidate(self, key: str) -> None:
+        self._invalidations += 1
+        self._local.invalidate(key)
+        if self.backend is not None:
+            await self._delete_backend(key)
+
+    async def close(self) -> None:
+        tasks = [task for _, task in self._loads.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[V | None]]
+    ) -> V | None:
+        invalidations = self._invalidations
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        load = self._loads.get(key)
+        if load is not None and load[0] == invalidations:
+            task = load[1]
+        else:
+            # the running load may have read what was invalidated since
+            task = asyncio.ensure_future(
+                self._load(key, loader, invalidations)
+            )
+            task.add_done_callback(lambda t: self._on_loaded(key, t))
+            self._loads[key] = (invalidations, task)
+        # a cancelled caller must not cancel the load for other waiters
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[V | None]],
+        invalidations: int,
+    ) -> V | None:
+        value = await loader()
+        if value is not None and invalidations == self._invalidations:
+            await self.set(key, value)
+        return value
+
+    def _on_loaded(self, key: str, task: asyncio.Task) -> None:
+        load = self._loads.get(key)
+        if load is not None and load[1] is task:
+            del self._loads[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def _delete_backend(self, key: str) -> None:
+        try:
+            await self.backend.delete(self._backend_key(key))
+        except BACKEND_ERRORS as e:
+            logger.warning("Cache backend delete failed: %r", e)
+
+    def _set_local(self, key: str, value: V) -> None:
+        self._local.set(key, (time.monotonic() + self.ttl, value))
+
+    def _backend_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+
+class TieredCache:
+    """Worker-local namespaces sharing one optional backend"""
+
+    def __init__(self, backend: CacheBackend | None = None):
+        self.backend = backend
+        self.namespaces: dict[str, CacheNamespace] = {}
+
+    def namespace(
+        self, name: str, ttl: float, maxsize: int, codec: CacheCodec
+    ) -> CacheNamespace[V]:
+        if name in self.namespaces:
+            raise ValueError(f"Cache namespace {name!r} already exists")
+
+        namespace = CacheNamespace(name, ttl, maxsize, codec, self.backend)
+        self.namespaces[name] = namespace
+        return namespace
+
+    async def close(self) -> None:
+        for namespace in self.namespaces.values():
+            await namespace.close()
+        if self.backend is not None:
+            await self.backend.close()
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Sequence
+from urllib.parse import unquote, urlsplit
+
+
+class CacheBackendError(Exception):
+    pass
+
+
+class CacheBackend(ABC):
+    """Shared second tier of a TieredCache, holds encoded values"""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Process-local stand-in for a shared backend"""
+
+    def __init__(self):
+        # key -> (expires at, value)
+        self._data: dict[str, tuple[float, bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class RedisCacheBackend(CacheBackend):
+    """GET, SET PX and DEL over RESP to a Redis-compatible server
+
+    ``url`` is ``redis://[[user]:password@]host[:port][/db]``. Connections
+    are opened on demand and reused, at most ``pool_size`` at a time.
+    """
+
+    def __init__(self, url: str, pool_size: int = 8, timeout: float = 0.5):
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported cache backend URL {url!r}")
+
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip("/") or 0)
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle: list[_RedisConnection] = []
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._execute(b"GET", key.encode())
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._execute(
+            b"SET", key.encode(), value, b"PX", str(int(ttl * 1000)).encode()
+        )
+
+    async def delete(self, key: str) -> None:
+        await self._execute(b"DEL", key.encode())
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._idle.pop().close()
+
+    async def _execute(self, *args: bytes) -> Any:
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(
+                        self._connect(), self.timeout
+                    )
+                reply = await asyncio.wait_for(
+                    connection.execute(args), self.timeout
+                )
+            except BaseException:
+                # the reply may still be in flight, never reuse it
+                if connection is not None:
+                    await connection.close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    async def _connect(self) -> "_RedisConnection":
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = _RedisConnection(reader, writer)
+        if self.password is not None:
+            credentials = [self.password.encode()]
+            if self.username is not None:
+                credentials.insert(0, self.username.encode())
+            await connection.execute((b"AUTH", *credentials))
+        if self.db:
+            await connection.execute((b"SELECT", str(self.db).encode()))
+        return connection
+
+
+class _RedisConnection:
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self.reader = reader
+        self.writer = writer
+
+    async def execute(self, args: Sequence[bytes]) -> Any:
+        self.writer.write(encode_command(args))
+        await self.writer.drain()
+        return await read_reply(self.reader)
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+
+def encode_command(args: Sequence[bytes]) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise CacheBackendError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        size = int(payload)
+        if size < 0:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if kind == b"*":
+        size = int(payload)
+        if size < 0:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise CacheBackendError(f"Unexpected reply {line!r}")
+
+
+def create_cache_backend(
+    url: str | None, pool_size: int = 8, timeout: float = 0.5
+) -> CacheBackend | None:
+    if not url:
+        return None
+    if url == "memory://":
+        return InMemoryCacheBackend()
+    return RedisCacheBackend(url, pool_size=pool_size, timeout=timeout)
@@ -0,0 +1,82 @@
+import time
+from enum import Enum
+from typing import Awaitable, Callable, ParamSpec, TypeVar
+
+from src.exceptions.services import UpstreamUnavailableException
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency until ``reset_timeout`` passes
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected at once. Once the timeout is over a single probe call
+    is let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        if self.opened_at is None:
+            return CircuitState.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return CircuitState.HALF_OPEN
+        return CircuitState.OPEN
+
+    @property
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self.opened_at
+        return max(0.0, self.reset_timeout - elapsed)
+
+    async def call(
+        self,
+        func: Callable[P, Awaitable[R]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> R:
+        state = self.state
+        if state is CircuitState.OPEN or (
+            state is CircuitState.HALF_OPEN and self._probe_in_flight
+        ):
+            raise UpstreamUnavailableException(
+                "Currency provider is unavailable, retry later"
+            )
+
+        is_probe = state is CircuitState.HALF_OPEN
+        self._probe_in_flight = self._probe_in_flight or is_probe
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self._record_failure(is_probe)
+            raise
+        finally:
+            if is_probe:
+                self._probe_in_flight = False
+
+        self._record_success()
+        return result
+
+    def _record_failure(self, is_probe: bool) -> None:
+        self.failures += 1
+        if is_probe or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def _record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
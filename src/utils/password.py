@@ -1,13 +1,33 @@
+import asyncio
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
 
 from passlib.context import CryptContext
 
+from src.core.config import password_hash_settings
+from src.exceptions.services import PasswordHasherBusyException
+
 logging.getLogger("passlib").setLevel(logging.ERROR)
 
+R = TypeVar("R")
+
 
 class PasswordHasher:
+    """bcrypt hashing, the async variants run on a bounded thread pool
+
+    bcrypt releases the GIL, so the threads hash in parallel while the
+    event loop keeps serving. Once ``WORKERS + QUEUE_SIZE`` calls are in
+    flight, new ones are rejected at once instead of queueing behind them.
+    """
+
     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+    _executor: ThreadPoolExecutor | None = None
+    _in_flight = 0
+    _lock = threading.Lock()
+
     @classmethod
     def hash(cls, password: str) -> str:
         return cls.pwd_context.hash(password)
@@ -15,3 +35,43 @@ class PasswordHasher:
     @classmethod
     def verify(cls, password: str, hashed_password: str) -> bool:
         return cls.pwd_context.verify(password, hashed_password)
+
+    @classmethod
+    async def hash_async(cls, password: str) -> str:
+        return await cls._run(cls.hash, password)
+
+    @classmethod
+    async def verify_async(cls, password: str, hashed_password: str) -> bool:
+        return await cls._run(cls.verify, password, hashed_password)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    async def _run(cls, func: Callable[..., R], *args) -> R:
+        limit = (
+            password_hash_settings.WORKERS + password_hash_settings.QUEUE_SIZE
+        )
+        with cls._lock:
+            if cls._in_flight >= limit:
+                raise PasswordHasherBusyException()
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=password_hash_settings.WORKERS,
+                    thread_name_prefix="password-hasher",
+                )
+            cls._in_flight += 1
+            # released when the thread is done, not when the caller stops
+            # waiting, so abandoned checks still count
+            future = cls._executor.submit(func, *args)
+        future.add_done_callback(cls._release)
+        return await asyncio.wrap_future(future)
+
+    @classmethod
+    def _release(cls, future: Future) -> None:
+        with cls._lock:
+            cls._in_flight -= 1
@@ -0,0 +1,82 @@
+import gzip
+import hashlib
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+
+class PreRenderedJSON:
+    """JSON body rendered once, kept plain and gzipped with strong ETags"""
+
+    media_type = "application/json"
+
+    def __init__(self, body: bytes):
+        self.body = body
+        # mtime=0 keeps the gzipped bytes identical across workers
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # a different byte representation, so a different strong tag
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> "PreRenderedJSON":
+        return cls(model.model_dump_json().encode())
+
+    def to_response(self, request: Request) -> Response:
+        gzipped = _accepts_gzip(request.headers.get("accept-encoding"))
+        headers = {
+            "ETag": self.gzip_etag if gzipped else self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if self._matches(request.headers.get("if-none-match")):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+            body = self.gzip_body
+        else:
+            body = self.body
+        return Response(body, media_type=self.media_type, headers=headers)
+
+    def _matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+
+        # If-None-Match uses the weak comparison
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") in (
+                self.etag,
+                self.gzip_etag,
+            ):
+                return True
+        return False
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    if not accept_encoding:
+        return False
+
+    qualities: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, *params = coding.split(";")
+        name = name.strip().lower()
+        if name in ("gzip", "*"):
+            qualities.setdefault(name, _quality(params))
+    # an explicit gzip entry takes precedence over *
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def _quality(params: list[str]) -> float:
+    for param in params:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value.strip())
+            except ValueError:
+                return 0.0
+    return 1.0
@@ -1,12 +1,14 @@
 from abc import ABC, abstractmethod
 
 from src.repositories.jwt import JwtTokenRepository
+from src.repositories.rates import RateSnapshotRepository
 from src.repositories.user import UserRepository
 
 
 class IUnitOfWork(ABC):
     user: UserRepository
     jwt_token: JwtTokenRepository
+    rate_snapshot: RateSnapshotRepository
 
     @abstractmethod
     def __init__(self):
@@ -38,6 +40,7 @@ class UnitOfWork(IUnitOfWork):
 
         self.user = UserRepository(self.session)
         self.jwt_token = JwtTokenRepository(self.session)
+        self.rate_snapshot = RateSnapshotRepository(self.session)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -12,7 +12,6 @@ from sqlalchemy.pool import NullPool
 from typing_extensions import NotRequired
 
 from main import app
-from src.api.dependencies.dependencies import get_session_maker
 from src.core.config import db_settings
 from src.db.database import Base
 from src.db.models import User
@@ -56,13 +55,15 @@ async def clean_tables(engine: AsyncEngine):
 
 @pytest.fixture()
 async def client(test_session_maker):
-    app.dependency_overrides[get_session_maker] = lambda: test_session_maker
+    app.state.session_maker = test_session_maker
 
-    async with AsyncClient(
-        transport=ASGITransport(app=app), base_url="http://test"
-    ) as test_client:
-        yield test_client
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as test_client:
+            yield test_client
     app.dependency_overrides.clear()
+    del app.state.session_maker
 
 
 # Fixtures for testing
@@ -1,6 +1,9 @@
 import pytest
 from httpx import AsyncClient
 
+from main import app
+from src.db.models import JwtToken
+
 
 @pytest.mark.asyncio
 async def test_login_success(client: AsyncClient, db_user, test_user_data, create_user_in_db):
@@ -53,6 +56,23 @@ async def test_refresh_success(client: AsyncClient, authed_user):
     assert response.cookies.get("refresh_token") is not None
 
 
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_is_rejected(
+    client: AsyncClient, authed_user
+):
+    client.headers = authed_user["headers"]
+    cookies = authed_user["cookies"]
+
+    client.cookies = cookies
+    first = await client.post("/api/auth/refresh")
+    client.cookies = cookies
+    reused = await client.post("/api/auth/refresh")
+
+    assert first.status_code == 201
+    assert reused.status_code == 401
+    assert reused.json() == {"detail": "Token has been revoked"}
+
+
 @pytest.mark.asyncio
 async def test_logout_success(client: AsyncClient, authed_user):
     client.cookies = authed_user["cookies"]
@@ -115,3 +135,22 @@ async def test_logout_all_success(client: AsyncClient, test_user_data):
     assert response.status_code == 200
     assert data["message"] == "Logged out from all devices"
     assert data["tokens_revoked"] == len(device_ids)
+
+
+@pytest.fixture
+async def stored_refresh_token(session, create_user_in_db, db_user) -> str:
+    await create_user_in_db(**db_user)
+    session.add(
+        JwtToken(
+            id="stored-jti", token_type="refresh", email=db_user["email"]
+        )
+    )
+    await session.commit()
+    return "stored-jti"
+
+
+@pytest.mark.asyncio
+async def test_refresh_tokens_are_loaded_from_the_app_database(
+    stored_refresh_token, client: AsyncClient
+):
+    assert app.state.refresh_tokens.is_active(stored_refresh_token)
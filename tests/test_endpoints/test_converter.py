@@ -1,6 +1,20 @@
+import httpx
 import pytest
 from httpx import AsyncClient
+from main import app
 from src.api.schemas.currency import CurrencyInfo
+from src.exceptions.services import RatesUnavailableException
+from src.services.catalog import CatalogEntry, TickerCatalog
+from src.services.rates import RateHistory, RateSnapshot
+
+
+def make_catalog(currencies) -> TickerCatalog:
+    return TickerCatalog(
+        CatalogEntry(
+            id=str(rank), symbol=currency.symbol, name=currency.name, rank=rank
+        )
+        for rank, currency in enumerate(currencies, 1)
+    )
 
 
 @pytest.mark.asyncio
@@ -31,6 +45,116 @@ async def test_get_currency_list(client: AsyncClient, authed_user, monkeypatch):
         assert currency["name"] == currencies[i].name
 
 
+@pytest.mark.asyncio
+async def test_currency_list_revalidates_with_etag(
+    client: AsyncClient, authed_user, monkeypatch
+):
+    currencies = [CurrencyInfo(symbol="BTC", name="Bitcoin")]
+    client.cookies = authed_user["cookies"]
+    client.headers = authed_user["headers"]
+
+    async def fake_get_available(self):
+        return currencies
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_available_symbols",
+        fake_get_available,
+    )
+
+    response = await client.get(
+        "/api/currency/list", headers={"Accept-Encoding": "gzip"}
+    )
+    etag = response.headers["etag"]
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["currencies"][0]["symbol"] == "BTC"
+
+    response = await client.get(
+        "/api/currency/list", headers={"If-None-Match": f"W/{etag}"}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    currencies = [CurrencyInfo(symbol="ETH", name="Ethereum")]
+    response = await client.get(
+        "/api/currency/list", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "accept_encoding, gzipped",
+    [
+        ("*;q=0, gzip", True),
+        ("gzip;level=1;q=0.5", True),
+        ("gzip;q=0, *", False),
+        ("br, deflate", False),
+    ],
+)
+async def test_currency_list_negotiates_gzip(
+    client: AsyncClient, authed_user, monkeypatch, accept_encoding, gzipped
+):
+    client.cookies = authed_user["cookies"]
+    client.headers = authed_user["headers"]
+
+    async def fake_get_available(self):
+        return [CurrencyInfo(symbol="BTC", name="Bitcoin")]
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_available_symbols",
+        fake_get_available,
+    )
+
+    response = await client.get(
+        "/api/currency/list", headers={"Accept-Encoding": accept_encoding}
+    )
+
+    assert response.status_code == 200
+    assert ("content-encoding" in response.headers) is gzipped
+    assert response.json()["currencies"][0]["symbol"] == "BTC"
+
+
+@pytest.mark.asyncio
+async def test_currency_list_encodings_have_their_own_etags(
+    client: AsyncClient, authed_user, monkeypatch
+):
+    client.cookies = authed_user["cookies"]
+    client.headers = authed_user["headers"]
+
+    async def fake_get_available(self):
+        return [CurrencyInfo(symbol="BTC", name="Bitcoin")]
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_available_symbols",
+        fake_get_available,
+    )
+
+    gzipped = await client.get(
+        "/api/currency/list", headers={"Accept-Encoding": "gzip"}
+    )
+    plain = await client.get(
+        "/api/currency/list", headers={"Accept-Encoding": "identity"}
+    )
+
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+
+    response = await client.get(
+        "/api/currency/list",
+        headers={
+            "Accept-Encoding": "identity",
+            "If-None-Match": gzipped.headers["etag"],
+        },
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == plain.headers["etag"]
+
 @pytest.mark.asyncio
 async def test_convert_success(client: AsyncClient, authed_user, monkeypatch):
     currencies = (
@@ -42,10 +166,13 @@ async def test_convert_success(client: AsyncClient, authed_user, monkeypatch):
     client.headers = authed_user["headers"]
     client.cookies = authed_user["cookies"]
 
-    async def fake_get_available(self):
-        return currencies
+    async def fake_get_catalog(self):
+        return make_catalog(currencies)
+
+    async def fake_get_rates(self, symbols=None):
+        return RateSnapshot.from_prices(version=1, prices={})
 
-    async def fake_convert(self, from_symbol, to_symbols, amount):
+    async def fake_convert(self, from_symbol, to_symbols, amount, snapshot):
         return {
             "BTC": 0.03625336,
             "USDT": 3944.025,
@@ -53,8 +180,12 @@ async def test_convert_success(client: AsyncClient, authed_user, monkeypatch):
         }
 
     monkeypatch.setattr(
-        "src.services.converter.ConverterService.get_available_symbols",
-        fake_get_available,
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_rates",
+        fake_get_rates,
     )
     monkeypatch.setattr(
         "src.services.converter.ConverterService.convert_currency",
@@ -76,6 +207,7 @@ async def test_convert_success(client: AsyncClient, authed_user, monkeypatch):
     assert data["rates"]["BTC"] == 0.03625336
     assert data["rates"]["USDT"] == 3944.025
     assert data["rates"]["DOGE"] == 17680.02671711
+    assert data["snapshot_age"] >= 0
 
 
 @pytest.mark.asyncio
@@ -84,12 +216,12 @@ async def test_convert_invalid_from_symbol(client: AsyncClient, authed_user, mon
     client.headers = authed_user["headers"]
     client.cookies = authed_user["cookies"]
 
-    async def fake_get_available(self):
-        return currencies
+    async def fake_get_catalog(self):
+        return make_catalog(currencies)
 
     monkeypatch.setattr(
-        "src.services.converter.ConverterService.get_available_symbols",
-        fake_get_available,
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
     )
 
     payload = {
@@ -109,12 +241,12 @@ async def test_convert_invalid_to_symbols(client: AsyncClient, authed_user, monk
     client.headers = authed_user["headers"]
     client.cookies = authed_user["cookies"]
 
-    async def fake_get_available(self):
-        return currencies
+    async def fake_get_catalog(self):
+        return make_catalog(currencies)
 
     monkeypatch.setattr(
-        "src.services.converter.ConverterService.get_available_symbols",
-        fake_get_available,
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
     )
     payload = {
         "from_symbol": "USDT",
@@ -132,12 +264,12 @@ async def test_convert_invalid_to_symbols(client: AsyncClient, authed_user, monk
 async def test_convert_invalid_unauthed_user(client: AsyncClient, monkeypatch):
     currencies = [CurrencyInfo(symbol="USDT", name="Tether Dollar U.S.")]
 
-    async def fake_get_available(self):
-        return currencies
+    async def fake_get_catalog(self):
+        return make_catalog(currencies)
 
     monkeypatch.setattr(
-        "src.services.converter.ConverterService.get_available_symbols",
-        fake_get_available,
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
     )
     payload = {
         "from_symbol": "ETH",
@@ -148,3 +280,307 @@ async def test_convert_invalid_unauthed_user(client: AsyncClient, monkeypatch):
 
     assert response.status_code == 401
     assert response.json() == {'detail': 'No Authorization header received'}
+
+
+@pytest.mark.asyncio
+async def test_cross_rate_matrix(client: AsyncClient, authed_user, monkeypatch):
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+
+    async def fake_get_catalog(self):
+        return make_catalog([
+            CurrencyInfo(symbol="BTC", name="Bitcoin"),
+            CurrencyInfo(symbol="ETH", name="Ethereum"),
+            CurrencyInfo(symbol="USDT", name="Tether Dollar U.S."),
+        ])
+
+    async def fake_get_rates(self, symbols=None):
+        return RateSnapshot.from_prices(
+            version=1, prices={"BTC": 60000.0, "ETH": 3000.0, "USDT": 1.0}
+        )
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_rates",
+        fake_get_rates,
+    )
+
+    response = await client.get(
+        "/api/currency/matrix", params={"symbols": "eth,BTC,usdt"}
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["symbols"] == ["ETH", "BTC", "USDT"]
+    assert data["matrix"] == [
+        [1.0, 0.05, 3000.0],
+        [20.0, 1.0, 60000.0],
+        [0.00033333, 0.00001667, 1.0],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cross_rate_matrix_invalid_symbol(client: AsyncClient, authed_user, monkeypatch):
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+
+    async def fake_get_catalog(self):
+        return make_catalog([CurrencyInfo(symbol="BTC", name="Bitcoin")])
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+
+    response = await client.get(
+        "/api/currency/matrix", params={"symbols": "BTC,DOGE"}
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "Invalid currencies: ['DOGE'], check the available symbols"}
+
+
+@pytest.mark.asyncio
+async def test_convert_batch(client: AsyncClient, authed_user, monkeypatch):
+    currencies = [
+        CurrencyInfo(symbol="BTC", name="Bitcoin"),
+        CurrencyInfo(symbol="ETH", name="Ethereum"),
+        CurrencyInfo(symbol="USDT", name="Tether Dollar U.S."),
+    ]
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+
+    async def fake_get_catalog(self):
+        return make_catalog(currencies)
+
+    async def fake_get_rates(self, symbols=None):
+        return RateSnapshot.from_prices(
+            version=1, prices={"BTC": 60000.0, "ETH": 3000.0, "USDT": 1.0}
+        )
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_rates",
+        fake_get_rates,
+    )
+
+    payload = [
+        {"from_symbol": "eth", "to_symbols": ["BTC", "usdt"], "amount": 2},
+        {"from_symbol": "DOGE", "to_symbols": ["BTC"], "amount": 1},
+        {"from_symbol": "BTC", "to_symbols": ["USDT"], "amount": 0.5},
+    ]
+    response = await client.post("/api/currency/convert/batch", json=payload)
+    items = response.json()["items"]
+
+    assert response.status_code == 200
+    assert len(items) == 3
+    assert items[0]["error"] is None
+    assert items[0]["result"]["from_symbol"] == "ETH"
+    assert items[0]["result"]["rates"] == {"BTC": 0.1, "USDT": 6000.0}
+    assert items[1]["result"] is None
+    assert items[1]["error"] == "Invalid 'from' symbol: 'DOGE'"
+    assert items[2]["result"]["rates"] == {"USDT": 30000.0}
+
+
+@pytest.mark.asyncio
+async def test_convert_batch_at_past_time_without_live_rates(
+    client: AsyncClient, authed_user, monkeypatch
+):
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+
+    async def fake_get_catalog(self):
+        return make_catalog(
+            [
+                CurrencyInfo(symbol="BTC", name="Bitcoin"),
+                CurrencyInfo(symbol="USDT", name="Tether Dollar U.S."),
+            ]
+        )
+
+    async def fake_get_rates(self, symbols=None):
+        raise RatesUnavailableException()
+
+    async def fake_get_historical_rates(self, at):
+        return RateSnapshot.from_prices(
+            version=0, prices={"BTC": 20000.0, "USDT": 1.0}
+        )
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_rates",
+        fake_get_rates,
+    )
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_historical_rates",
+        fake_get_historical_rates,
+    )
+
+    payload = [
+        {
+            "from_symbol": "BTC",
+            "to_symbols": ["USDT"],
+            "at": "2023-03-01T12:00:00Z",
+        }
+    ]
+    response = await client.post("/api/currency/convert/batch", json=payload)
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["result"]["rates"] == {"USDT": 20000.0}
+
+
+@pytest.mark.asyncio
+async def test_convert_batch_too_large(client: AsyncClient, authed_user, monkeypatch):
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+
+    async def fake_get_catalog(self):
+        return make_catalog([CurrencyInfo(symbol="BTC", name="Bitcoin")])
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+    monkeypatch.setattr(
+        "src.core.config.currency_api_settings.BATCH_MAX_SIZE", 1
+    )
+
+    payload = [
+        {"from_symbol": "BTC", "to_symbols": ["BTC"]},
+        {"from_symbol": "BTC", "to_symbols": ["BTC"]},
+    ]
+    response = await client.post("/api/currency/convert/batch", json=payload)
+
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Too many items: 2, the limit is 1"}
+
+
+@pytest.mark.asyncio
+async def test_convert_at_past_time(client: AsyncClient, authed_user, monkeypatch):
+    currencies = [
+        CurrencyInfo(symbol="BTC", name="Bitcoin"),
+        CurrencyInfo(symbol="USDT", name="Tether Dollar U.S."),
+    ]
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+    requested_at = []
+
+    async def fake_get_catalog(self):
+        return make_catalog(currencies)
+
+    async def fake_get_historical_rates(self, at):
+        requested_at.append(at)
+        return RateSnapshot.from_prices(
+            version=0, prices={"BTC": 20000.0, "USDT": 1.0}
+        )
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_historical_rates",
+        fake_get_historical_rates,
+    )
+
+    payload = {
+        "from_symbol": "BTC",
+        "to_symbols": ["USDT"],
+        "amount": 2,
+        "at": "2023-03-01T12:00:00Z",
+    }
+    response = await client.post("/api/currency/convert", json=payload)
+
+    assert response.status_code == 200
+    assert response.json()["rates"] == {"USDT": 40000.0}
+    assert requested_at[0].isoformat() == "2023-03-01T12:00:00+00:00"
+
+
+@pytest.mark.asyncio
+async def test_convert_at_time_without_history(
+    client: AsyncClient, authed_user, monkeypatch, test_session_maker
+):
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+    monkeypatch.setattr(
+        app.state.converter_service,
+        "rate_history",
+        RateHistory(test_session_maker, cache_size=1),
+    )
+
+    async def fake_get_catalog(self):
+        return make_catalog([CurrencyInfo(symbol="BTC", name="Bitcoin")])
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+
+    payload = {
+        "from_symbol": "BTC",
+        "to_symbols": ["BTC"],
+        "at": "2001-01-01T00:00:00Z",
+    }
+    response = await client.post("/api/currency/convert", json=payload)
+
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "No rates recorded at or before 2001-01-01T00:00:00+00:00"}
+
+
+@pytest.mark.asyncio
+async def test_provider_status_requires_authentication(
+    client: AsyncClient, authed_user
+):
+    response = await client.get("/api/currency/status")
+
+    assert response.status_code == 401
+
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+    response = await client.get("/api/currency/status")
+
+    assert response.status_code == 200
+    assert response.json()["providers"][0]["breaker_state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_convert_on_demand_upstream_failure(
+    client: AsyncClient, authed_user, monkeypatch
+):
+    client.headers = authed_user["headers"]
+    client.cookies = authed_user["cookies"]
+
+    async def fake_get_catalog(self):
+        return make_catalog([CurrencyInfo(symbol="BTC", name="Bitcoin")])
+
+    async def fake_get_json(async_client, url, params=None):
+        request = httpx.Request("GET", url, params=params)
+        response = httpx.Response(502, request=request)
+        response.raise_for_status()
+
+    monkeypatch.setattr(
+        "src.services.converter.ConverterService.get_catalog",
+        fake_get_catalog,
+    )
+    monkeypatch.setattr("src.services.providers.get_json", fake_get_json)
+    monkeypatch.setattr(
+        app.state.converter_service, "refresh_enabled", False
+    )
+
+    payload = {"from_symbol": "BTC", "to_symbols": ["BTC"]}
+    response = await client.post("/api/currency/convert", json=payload)
+
+    assert response.status_code == 503
+    assert response.json() == {
+        "detail": "Currency rates are temporarily unavailable"
+    }
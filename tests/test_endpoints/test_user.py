@@ -71,6 +71,25 @@ async def test_about_me(client: AsyncClient, test_user_data, authed_user):
     assert data["username"] == test_user_data["username"]
 
 
+@pytest.mark.asyncio
+async def test_about_me_after_profile_update(client: AsyncClient, authed_user):
+    client.cookies = authed_user["cookies"]
+    headers = {"Authorization": authed_user["headers"]["Authorization"]}
+
+    response = await client.get("/api/user/about_me", headers=headers)
+    assert response.json()["first_name"] is None
+
+    await client.put(
+        "/api/user/complete_profile",
+        json={"first_name": "John", "last_name": "Doe"},
+        headers=headers
+    )
+    response = await client.get("/api/user/about_me", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "John"
+
+
 @pytest.mark.asyncio
 async def test_about_me_unauthorized(client: AsyncClient):
     response = await client.get("/api/user/about_me")
@@ -0,0 +1,117 @@
+import asyncio
+import datetime
+import threading
+
+import pytest
+from sqlalchemy import func, select
+
+from src.core.config import password_hash_settings
+from src.core.security import (
+    JwtAuth,
+    JwtPayload,
+    TokenTypeEnum,
+    VerifiedTokenCache,
+)
+from src.db.models import JwtToken
+from src.exceptions.services import (
+    PasswordHasherBusyException,
+    WrongTokenTypeException,
+)
+from src.services.auth import AuthService
+from src.services.user import USER_CODEC, UserService
+from src.utils.cache import TieredCache
+from src.utils.password import PasswordHasher
+from src.utils.unit_of_work import UnitOfWork
+
+
+@pytest.mark.asyncio
+async def test_verified_tokens_skip_decoding_until_evicted(monkeypatch):
+    decoded = []
+    decode_token = JwtAuth.decode_token
+
+    def counting_decode(token: str, verify_exp: bool = False) -> JwtPayload:
+        decoded.append(token)
+        return decode_token(token, verify_exp)
+
+    monkeypatch.setattr(JwtAuth, "decode_token", counting_decode)
+    cache = VerifiedTokenCache(maxsize=10)
+    service = AuthService(None, token_cache=cache)
+    payload = JwtAuth.create_payload(
+        {"sub": "test@example.com", "device_id": "device"},
+        TokenTypeEnum.ACCESS,
+    )
+    token = JwtAuth.create_token(payload)
+
+    for _ in range(3):
+        verified = await service.verify_token_and_type(
+            token, TokenTypeEnum.ACCESS
+        )
+    with pytest.raises(WrongTokenTypeException):
+        await service.verify_token_and_type(token, TokenTypeEnum.REFRESH)
+
+    assert verified.jti == payload.jti
+    assert decoded == [token]
+
+    cache.evict_subject("test@example.com")
+    assert len(cache) == 0
+
+    expired = payload.model_copy(
+        update={"exp": payload.iat - datetime.timedelta(seconds=1)}
+    )
+    cache.add("expired", expired)
+    assert cache.get("expired") is None
+
+
+@pytest.mark.asyncio
+async def test_deleted_users_are_evicted_from_the_caches(
+    test_session_maker, session, create_user_in_db, db_user
+):
+    user = await create_user_in_db(**db_user)
+    session.add(JwtToken(id="jti", token_type="refresh", email=user.email))
+    await session.commit()
+    token_cache = VerifiedTokenCache(maxsize=10)
+    token_cache.add(
+        "token",
+        JwtAuth.create_payload(
+            {"sub": user.email, "device_id": "device"}, TokenTypeEnum.ACCESS
+        ),
+    )
+    user_cache = TieredCache().namespace(
+        "users", ttl=60, maxsize=10, codec=USER_CODEC
+    )
+    service = UserService(
+        UnitOfWork(test_session_maker), user_cache, token_cache
+    )
+    assert await service.get_user(user.email) is not None
+
+    assert await service.delete_user(user.username)
+    assert len(token_cache) == 0
+    assert await service.get_user(user.email) is None
+    assert await session.scalar(select(func.count(JwtToken.id))) == 0
+    assert not await service.delete_user(user.username)
+
+
+@pytest.mark.asyncio
+async def test_password_checks_beyond_the_queue_are_rejected(monkeypatch):
+    monkeypatch.setattr(password_hash_settings, "WORKERS", 1)
+    monkeypatch.setattr(password_hash_settings, "QUEUE_SIZE", 1)
+    PasswordHasher.shutdown()
+    release = threading.Event()
+    monkeypatch.setattr(
+        PasswordHasher,
+        "verify",
+        classmethod(lambda cls, password, hashed: release.wait(5)),
+    )
+
+    running = [
+        asyncio.ensure_future(PasswordHasher.verify_async("password", "x"))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusyException):
+        await PasswordHasher.verify_async("password", "x")
+
+    release.set()
+    assert await asyncio.gather(*running) == [True, True]
+    assert await PasswordHasher.verify_async("password", "x")
+    PasswordHasher.shutdown()
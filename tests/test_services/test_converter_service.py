@@ -0,0 +1,220 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.core.config import currency_api_settings
+from src.exceptions.services import UpstreamUnavailableException
+from src.services.catalog import CatalogEntry, TickerCatalog
+from src.services.converter import ConverterService
+from src.services.rates import RateRefresher
+from src.utils.circuit_breaker import CircuitState
+
+TICKERS = [
+    {"id": "90", "symbol": "BTC", "name": "Bitcoin", "price_usd": "60000"},
+    {"id": "80", "symbol": "ETH", "name": "Ethereum", "price_usd": "3000"},
+    {"id": "518", "symbol": "USDT", "name": "Tether", "price_usd": "1"},
+]
+# upstream paths are recorded relative to the configured API URL
+API_PATH = httpx.URL(currency_api_settings.API_URL).path.rstrip("/")
+
+
+def make_upstream(calls: list[str]) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path.removeprefix(API_PATH))
+        await asyncio.sleep(0.01)
+
+        if request.url.path.endswith("/tickers/"):
+            return httpx.Response(200, json={"data": TICKERS})
+
+        ids = request.url.params["id"].split(",")
+        return httpx.Response(
+            200, json=[ticker for ticker in TICKERS if ticker["id"] in ids]
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_catalog_concurrent_misses_fetch_once():
+    calls = []
+    async with httpx.AsyncClient(transport=make_upstream(calls)) as client:
+        service = ConverterService(client)
+        catalogs = await asyncio.gather(
+            *(service.get_catalog() for _ in range(100))
+        )
+
+    assert calls.count("/tickers/") == 1
+    assert all(catalog is catalogs[0] for catalog in catalogs)
+    assert catalogs[0].resolve("eth").id == "80"
+
+
+@pytest.mark.asyncio
+async def test_currency_list_is_built_once_per_catalog():
+    calls = []
+    async with httpx.AsyncClient(transport=make_upstream(calls)) as client:
+        service = ConverterService(client)
+        first = await service.get_available_symbols()
+        second = await service.get_available_symbols()
+        service.catalog_cache.clear()
+        reloaded = await service.get_available_symbols()
+
+    assert second is first
+    assert reloaded is not first
+    assert [currency.symbol for currency in first] == ["BTC", "ETH", "USDT"]
+
+
+@pytest.mark.asyncio
+async def test_convert_is_served_from_rate_snapshot():
+    calls = []
+    async with httpx.AsyncClient(transport=make_upstream(calls)) as client:
+        service = ConverterService(client)
+        snapshot = await RateRefresher(service, interval=60).refresh()
+        calls.clear()
+
+        rates = await service.convert_currency("ETH", ["BTC", "USDT"], 2)
+
+    assert calls == []
+    assert snapshot.version == 1
+    assert rates == {"BTC": 0.1, "USDT": 6000.0}
+
+
+@pytest.mark.asyncio
+async def test_pair_rates_follow_only_changed_legs():
+    service = ConverterService(None)
+    rate_table = service.rate_table
+    rate_table.publish({"BTC": 60000.0, "ETH": 3000.0, "USDT": 1.0})
+    await service.convert_currency("ETH", ["BTC", "USDT"], 2)
+    await service.convert_currency("BTC", ["USDT"], 1)
+
+    rate_table.publish({"BTC": 60000.0, "ETH": 1500.0, "USDT": 1.0})
+    assert service.pair_rates._ratios.get(("BTC", "USDT")) == 60000.0
+    rates = await service.convert_currency("ETH", ["BTC", "USDT"], 2)
+
+    assert rates == {"BTC": 0.05, "USDT": 3000.0}
+    assert (service.pair_rates.hits, service.pair_rates.misses) == (2, 3)
+
+    rate_table.publish({"BTC": 60000.0, "ETH": 1500.0})
+    assert ("ETH", "USDT") not in service.pair_rates._ratios
+    assert len(service.pair_rates) == 1
+
+
+@pytest.mark.asyncio
+async def test_on_demand_price_lookups_are_coalesced():
+    calls = []
+    async with httpx.AsyncClient(transport=make_upstream(calls)) as client:
+        service = ConverterService(client)
+        service.refresh_enabled = False
+        await service.get_catalog()
+        calls.clear()
+
+        snapshots = await asyncio.gather(
+            *(
+                service.get_rates(symbols)
+                for symbols in [["eth", "BTC"], ["BTC", "USDT"], ["XYZ"]] * 20
+            )
+        )
+
+    assert calls == ["/ticker/"]
+    assert service.price_coalescer.fetch_count == 1
+    assert service.rate_table.snapshot is None
+    assert snapshots[0].symbols == ("ETH", "BTC")
+    assert snapshots[1].convert("USDT", ["BTC"], 60000).tolist() == [1.0]
+    assert len(snapshots[2]) == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_served_while_refreshing():
+    calls = []
+    async with httpx.AsyncClient(transport=make_upstream(calls)) as client:
+        service = ConverterService(client)
+        stale = await service.refresh_rates()
+        stale.captured_at -= 120
+        calls.clear()
+
+        served = await service.get_rates()
+        fresh = await service.refresh_rates()
+
+    assert served is stale
+    assert calls.count("/ticker/") == 1
+    assert fresh.version == stale.version + 1
+    assert service.rate_table.snapshot is fresh
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    monkeypatch.setattr(
+        "src.core.config.currency_api_settings.UPSTREAM_RETRIES", 0
+    )
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(502)
+
+    transport = httpx.MockTransport(handler)
+    async with httpx.AsyncClient(transport=transport) as client:
+        service = ConverterService(client)
+        breaker = service.providers.slots[0].breaker
+        threshold = breaker.failure_threshold
+        for _ in range(threshold):
+            with pytest.raises(UpstreamUnavailableException):
+                await service.get_catalog()
+
+        with pytest.raises(UpstreamUnavailableException):
+            await service.get_catalog()
+
+    assert len(calls) == threshold
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.retry_after > 0
+
+
+def test_catalog_resolves_duplicate_symbols_by_rank():
+    catalog = TickerCatalog(
+        [
+            CatalogEntry(id="7", symbol="ABC", name="Late Abc", rank=900),
+            CatalogEntry(id="3", symbol="abc", name="Abc Coin", rank=12),
+            CatalogEntry(id="5", symbol="ABC ", name="Abc Clone", rank=12),
+        ]
+    )
+
+    assert len(catalog) == 3
+    assert " abc" in catalog
+    assert catalog.resolve("ABC").id == "3"
+    assert catalog.resolve("XYZ") is None
+
+
+@pytest.mark.asyncio
+async def test_catalog_loads_every_page_with_retries(monkeypatch):
+    monkeypatch.setattr(
+        "src.core.config.currency_api_settings.UPSTREAM_RETRY_BACKOFF", 0
+    )
+    tickers = [
+        {"id": str(i), "symbol": f"C{i}", "name": f"Coin {i}", "rank": i}
+        for i in range(1, 251)
+    ]
+    failed_starts = set()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        start = int(request.url.params["start"])
+        limit = int(request.url.params["limit"])
+        if start == 100 and start not in failed_starts:
+            failed_starts.add(start)
+            return httpx.Response(502)
+
+        return httpx.Response(
+            200,
+            json={
+                "data": tickers[start : start + limit],
+                "info": {"coins_num": len(tickers)},
+            },
+        )
+
+    transport = httpx.MockTransport(handler)
+    async with httpx.AsyncClient(transport=transport) as client:
+        catalog = await ConverterService(client).get_catalog()
+
+    assert len(catalog) == 250
+    assert catalog.page_count == 3
+    assert catalog.version == 1
+    assert catalog.resolve("C250").id == "250"
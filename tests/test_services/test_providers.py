@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from src.services.converter import ConverterService
+from src.services.providers import (
+    LatencyHistogram,
+    ProviderPool,
+    RateProvider,
+)
+
+TICKERS = [
+    {"id": "90", "symbol": "BTC", "name": "Bitcoin", "price_usd": "60000"},
+    {"id": "80", "symbol": "ETH", "name": "Ethereum", "price_usd": "3000"},
+]
+
+
+class StubProvider(RateProvider):
+    def __init__(self, name: str, delay: float, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def _answer(self, payload):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ValueError(f"{self.name} is broken")
+        return payload
+
+    async def fetch_tickers_page(self, start: int, limit: int) -> dict:
+        return await self._answer({"data": TICKERS[start : start + limit]})
+
+    async def fetch_tickers(self, ids: list[str]) -> list[dict]:
+        return await self._answer(
+            [ticker for ticker in TICKERS if ticker["id"] in ids]
+        )
+
+
+def make_pool(*providers: RateProvider) -> ProviderPool:
+    return ProviderPool(
+        providers,
+        failure_threshold=3,
+        reset_timeout=30,
+        min_hedge_delay=0.01,
+        max_hedge_delay=0.05,
+    )
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    primary = StubProvider("primary", delay=1)
+    secondary = StubProvider("secondary", delay=0.01)
+    pool = make_pool(primary, secondary)
+
+    tickers = await pool.fetch_tickers(["80"])
+    await asyncio.sleep(0)
+
+    assert tickers == [TICKERS[1]]
+    assert (primary.calls, secondary.calls) == (1, 1)
+    assert primary.cancelled == 1
+    assert pool.slots[1].latency.total == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    primary = StubProvider("primary", delay=0.001)
+    secondary = StubProvider("secondary", delay=0.001)
+    pool = make_pool(primary, secondary)
+
+    for _ in range(5):
+        await pool.fetch_tickers(["90"])
+
+    assert (primary.calls, secondary.calls) == (5, 0)
+    assert pool.slots[0].hedge_delay == 0.01
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_over_without_waiting():
+    primary = StubProvider("primary", delay=0, fail=True)
+    secondary = StubProvider("secondary", delay=0)
+    service = ConverterService(None, providers=make_pool(primary, secondary))
+
+    catalog = await service.get_catalog()
+
+    assert catalog.resolve("BTC").id == "90"
+    assert service.providers.slots[0].breaker.failures == 1
+
+
+def test_latency_histogram_quantile():
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.95) is None
+
+    for _ in range(95):
+        histogram.record(0.01)
+    for _ in range(5):
+        histogram.record(1.0)
+
+    assert 0.01 <= histogram.quantile(0.95) < 0.0125
+    assert 1.0 <= histogram.quantile(0.99) < 1.25
@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from src.db.models import RateSnapshotPrice
+from src.repositories.rates import RateSnapshotRepository
+from src.services.rates import RateHistory, RateSnapshot, SnapshotRecorder
+from src.utils.unit_of_work import UnitOfWork
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_copied_in_bulk(test_session_maker, session):
+    prices = {f"C{i}": float(i) for i in range(1, 10_001)}
+    snapshot = RateSnapshot.from_prices(version=1, prices=prices)
+    recorder = SnapshotRecorder(UnitOfWork(test_session_maker), queue_size=1)
+
+    rows = await recorder.record(snapshot)
+    stored = await session.scalar(
+        select(func.count()).select_from(RateSnapshotPrice)
+    )
+    price = await session.scalar(
+        select(RateSnapshotPrice.price_usd).filter_by(symbol="C42")
+    )
+
+    assert rows == stored == 10_000
+    assert price == 42.0
+
+
+@pytest.mark.asyncio
+async def test_history_picks_snapshot_at_or_before(
+    test_session_maker, monkeypatch
+):
+    day = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    uow = UnitOfWork(test_session_maker)
+    recorder = SnapshotRecorder(uow, queue_size=1)
+    for hour, btc_price in ((0, 90000.0), (12, 95000.0)):
+        await recorder.record(
+            RateSnapshot.from_prices(
+                version=hour,
+                prices={"BTC": btc_price, "USDT": 1.0},
+                captured_at=(day + datetime.timedelta(hours=hour)).timestamp(),
+            )
+        )
+
+    history = RateHistory(test_session_maker, cache_size=4)
+    morning = await history.get_snapshot_at(day + datetime.timedelta(hours=6))
+    evening = await history.get_snapshot_at(day + datetime.timedelta(hours=13))
+
+    assert morning.vector[morning.index["BTC"]] == 90000.0
+    assert evening.vector[evening.index["BTC"]] == 95000.0
+    assert (
+        await history.get_snapshot_at(day - datetime.timedelta(days=1)) is None
+    )
+
+    queries = []
+    original = RateSnapshotRepository.get_snapshot_at
+
+    async def counted(self, at):
+        queries.append(at)
+        return await original(self, at)
+
+    monkeypatch.setattr(RateSnapshotRepository, "get_snapshot_at", counted)
+    repeated = await history.get_snapshot_at(
+        (day + datetime.timedelta(hours=9)).replace(tzinfo=None)
+    )
+
+    assert repeated is morning
+    assert queries == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_history_misses_use_their_own_sessions(
+    test_session_maker,
+):
+    day = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    recorder = SnapshotRecorder(UnitOfWork(test_session_maker), queue_size=1)
+    for hour, btc_price in ((0, 90000.0), (12, 95000.0)):
+        await recorder.record(
+            RateSnapshot.from_prices(
+                version=hour,
+                prices={"BTC": btc_price},
+                captured_at=(day + datetime.timedelta(hours=hour)).timestamp(),
+            )
+        )
+
+    history = RateHistory(test_session_maker, cache_size=4)
+    morning, evening = await asyncio.gather(
+        history.get_snapshot_at(day + datetime.timedelta(hours=6)),
+        history.get_snapshot_at(day + datetime.timedelta(hours=13)),
+    )
+
+    assert morning.vector[morning.index["BTC"]] == 90000.0
+    assert evening.vector[evening.index["BTC"]] == 95000.0
@@ -0,0 +1,53 @@
+import pytest
+
+from src.services.rates import RateSnapshot
+from src.services.stream import RateBroadcaster
+
+
+@pytest.mark.asyncio
+async def test_subscribers_get_only_their_changed_prices():
+    broadcaster = RateBroadcaster(buffer_size=4)
+    broadcaster.publish(
+        RateSnapshot.from_prices(1, {"BTC": 60000.0, "ETH": 3000.0})
+    )
+    btc = broadcaster.subscribe(["BTC"])
+    both = broadcaster.subscribe(["BTC", "ETH"])
+
+    broadcaster.publish(
+        RateSnapshot.from_prices(2, {"BTC": 60000.0, "ETH": 3100.0})
+    )
+
+    assert (await btc.get(timeout=0)).rates == {"BTC": 60000.0}
+    assert await btc.get(timeout=0) is None
+    assert (await both.get(timeout=0)).rates == {
+        "BTC": 60000.0,
+        "ETH": 3000.0,
+    }
+    update = await both.get(timeout=0)
+    assert update.version == 2
+    assert update.rates == {"ETH": 3100.0}
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_updates_are_merged():
+    broadcaster = RateBroadcaster(buffer_size=2)
+    slow = broadcaster.subscribe(["BTC", "ETH"])
+
+    for version in range(1, 6):
+        broadcaster.publish(
+            RateSnapshot.from_prices(
+                version, {"BTC": 60000.0 + version, "ETH": 3000.0}
+            )
+        )
+
+    update = await slow.get(timeout=0)
+    assert slow.conflated == 2
+    assert update.version == 5
+    assert update.rates == {"BTC": 60005.0, "ETH": 3000.0}
+    assert await slow.get(timeout=0) is None
+
+    broadcaster.unsubscribe(slow)
+    broadcaster.publish(RateSnapshot.from_prices(6, {"BTC": 1.0}))
+    assert slow.closed
+    assert await slow.get(timeout=0) is None
+    assert len(broadcaster) == 0
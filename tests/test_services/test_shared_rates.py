@@ -0,0 +1,115 @@
+import os
+import tempfile
+import uuid
+from multiprocessing import resource_tracker
+
+import pytest
+
+from src.services.converter import ConverterService
+from src.services.rates import RateRefresher, RateSnapshot
+from src.services.shared_rates import (
+    SEQUENCE,
+    SharedRateSegment,
+    SharedRateSync,
+)
+
+
+@pytest.fixture
+def segment_name():
+    name = f"rates-test-{uuid.uuid4().hex[:8]}"
+    yield name
+    segment = SharedRateSegment(name, capacity=1)
+    # the segment is untracked, unlink expects it to be tracked
+    resource_tracker.register(segment._shm._name, "shared_memory")
+    segment._shm.unlink()
+    segment.close()
+    lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+    if os.path.exists(lock_path):
+        os.remove(lock_path)
+
+
+def test_segment_readers_skip_known_and_busy_snapshots(segment_name):
+    writer = SharedRateSegment(segment_name, capacity=8)
+    reader = SharedRateSegment(segment_name, capacity=8)
+    assert reader.read() is None
+
+    writer.write(RateSnapshot.from_prices(1, {"BTC": 60000.0, "ETH": 3000.0}))
+    first = reader.read()
+    assert first.version == 1
+    assert first.prices() == {"BTC": 60000.0, "ETH": 3000.0}
+    assert reader.read(known_version=1) is None
+
+    writer.write(RateSnapshot.from_prices(2, {"BTC": 61000.0, "ETH": 3000.0}))
+    second = reader.read(known_version=1)
+    assert second.symbols is first.symbols
+    assert first.prices()["BTC"] == 60000.0
+
+    # a write in progress
+    SEQUENCE.pack_into(writer._shm.buf, 0, 5)
+    assert reader.read() is None
+
+    writer.write(RateSnapshot.from_prices(3, {"USDT": 1.0}))
+    assert reader.read().prices() == {"USDT": 1.0}
+    reader.close()
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_followers_publish_the_leader_rates(segment_name):
+    syncs = []
+    for _ in range(2):
+        service = ConverterService(None)
+        refresher = RateRefresher(service, interval=60)
+        refresher.start = lambda: None
+        syncs.append(
+            SharedRateSync(
+                segment_name,
+                capacity=8,
+                rate_table=service.rate_table,
+                refresher=refresher,
+                poll_interval=60,
+            )
+        )
+        syncs[-1].start()
+    leader, follower = syncs
+    follower_service = follower.refresher.converter_service
+
+    assert leader.is_leader and not follower.is_leader
+    assert follower_service.follow_shared_rates
+
+    leader.rate_table.publish({"BTC": 60000.0, "ETH": 3000.0})
+    follower.poll()
+    rates = await follower_service.convert_currency("ETH", ["BTC"], 2)
+    assert follower.rate_table.snapshot.version == 1
+    assert rates == {"BTC": 0.1}
+
+    await leader.stop()
+    follower.poll()
+    assert follower.is_leader
+    assert not follower_service.follow_shared_rates
+    await follower.stop()
+
+
+@pytest.mark.asyncio
+async def test_leader_replaces_a_segment_that_is_too_small(segment_name):
+    SharedRateSegment(segment_name, capacity=1).close()
+    reader = SharedRateSegment(segment_name, capacity=8)
+    assert reader.read() is None
+
+    service = ConverterService(None)
+    refresher = RateRefresher(service, interval=60)
+    refresher.start = lambda: None
+    leader = SharedRateSync(
+        segment_name,
+        capacity=8,
+        rate_table=service.rate_table,
+        refresher=refresher,
+        poll_interval=60,
+    )
+    leader.start()
+    service.rate_table.publish({"BTC": 60000.0, "ETH": 3000.0})
+
+    assert leader.is_leader
+    assert reader.read().prices() == {"BTC": 60000.0, "ETH": 3000.0}
+    reader.close()
+    await leader.stop()
@@ -0,0 +1,212 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.schemas.currency import CurrencyInfo
+from src.core.config import currency_api_settings
+from src.services.converter import ConverterService
+from src.utils.cache import TieredCache, model_codec
+from src.utils.cache_backends import (
+    InMemoryCacheBackend,
+    RedisCacheBackend,
+    encode_command,
+    read_reply,
+)
+
+TICKERS = [
+    {"id": "90", "symbol": "BTC", "name": "Bitcoin", "price_usd": "60000"},
+    {"id": "80", "symbol": "ETH", "name": "Ethereum", "price_usd": "3000"},
+]
+# upstream paths are recorded relative to the configured API URL
+API_PATH = httpx.URL(currency_api_settings.API_URL).path.rstrip("/")
+
+
+def make_upstream(calls: list[str]) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path.removeprefix(API_PATH))
+        if request.url.path.endswith("/tickers/"):
+            return httpx.Response(200, json={"data": TICKERS})
+        return httpx.Response(200, json=TICKERS)
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_hosts_share_catalog_and_rates_through_the_backend():
+    backend = InMemoryCacheBackend()
+    calls = []
+    async with httpx.AsyncClient(transport=make_upstream(calls)) as client:
+        first = ConverterService(client, cache=TieredCache(backend))
+        second = ConverterService(client, cache=TieredCache(backend))
+
+        await first.refresh_rates()
+        catalog = await second.get_catalog()
+        snapshot = await second.refresh_rates()
+
+    assert calls == ["/tickers/", "/ticker/"]
+    assert [entry.symbol for entry in catalog.entries] == ["BTC", "ETH"]
+    assert snapshot.prices() == {"BTC": 60000.0, "ETH": 3000.0}
+    assert snapshot.captured_at == first.rate_table.snapshot.captured_at
+    assert second.shared_snapshot.backend_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_only_the_fetching_host_persists_a_shared_snapshot():
+    backend = InMemoryCacheBackend()
+    persisted = []
+    async with httpx.AsyncClient(transport=make_upstream([])) as client:
+        first = ConverterService(client, cache=TieredCache(backend))
+        second = ConverterService(client, cache=TieredCache(backend))
+        for service in (first, second):
+            service.rate_table.add_listener(persisted.append, adopted=False)
+
+        fetched = await first.refresh_rates()
+        adopted = await second.refresh_rates()
+
+    assert adopted.captured_at == fetched.captured_at
+    assert persisted == [fetched]
+
+
+@pytest.mark.asyncio
+async def test_namespace_is_bounded_and_invalidated_on_both_tiers():
+    backend = InMemoryCacheBackend()
+    local = TieredCache(backend).namespace(
+        "currencies", ttl=60, maxsize=1, codec=model_codec(CurrencyInfo)
+    )
+    other = TieredCache(backend).namespace(
+        "currencies", ttl=60, maxsize=1, codec=model_codec(CurrencyInfo)
+    )
+
+    await local.set("BTC", CurrencyInfo(symbol="BTC", name="Bitcoin"))
+    await local.set("ETH", CurrencyInfo(symbol="ETH", name="Ethereum"))
+    assert len(local) == 1
+    assert (await local.get("BTC")).name == "Bitcoin"
+    assert (await other.get("ETH")).name == "Ethereum"
+
+    await local.invalidate("ETH")
+    assert await local.get("ETH") is None
+    assert (local.hits, local.backend_hits, local.misses) == (0, 1, 1)
+    assert len(backend) == 1
+
+
+@pytest.mark.asyncio
+async def test_undecodable_backend_entries_are_misses():
+    backend = InMemoryCacheBackend()
+    namespace = TieredCache(backend).namespace(
+        "currencies", ttl=60, maxsize=1, codec=model_codec(CurrencyInfo)
+    )
+    await backend.set("currencies:BTC", b'{"symbol": "BTC"}', ttl=60)
+
+    assert await namespace.get("BTC") is None
+    assert (namespace.backend_hits, namespace.misses) == (0, 1)
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_speaks_resp():
+    data: dict[bytes, bytes] = {}
+
+    async def serve(reader, writer):
+        while not reader.at_eof():
+            try:
+                command, *args = await read_reply(reader)
+            except asyncio.IncompleteReadError:
+                break
+            if command == b"SET":
+                data[args[0]] = args[1]
+                writer.write(b"+OK\r\n")
+            elif command == b"GET":
+                value = data.get(args[0])
+                writer.write(
+                    b"$-1\r\n"
+                    if value is None
+                    else encode_command([value])[4:]
+                )
+            elif command == b"DEL":
+                writer.write(
+                    b":%d\r\n" % int(data.pop(args[0], None) is not None)
+                )
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    backend = RedisCacheBackend(f"redis://127.0.0.1:{port}/0")
+    try:
+        await backend.set("users:a@b.c", b"\x00payload\r\n", ttl=1.5)
+        assert await backend.get("users:a@b.c") == b"\x00payload\r\n"
+        await backend.delete("users:a@b.c")
+        assert await backend.get("users:a@b.c") is None
+        assert data == {}
+    finally:
+        await backend.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_loads_are_shared_and_dropped_when_invalidated():
+    namespace = TieredCache().namespace(
+        "currencies", ttl=60, maxsize=10, codec=model_codec(CurrencyInfo)
+    )
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return CurrencyInfo(symbol="BTC", name=f"Bitcoin {len(loads)}")
+
+    first, second = await asyncio.gather(
+        namespace.get_or_load("BTC", load), namespace.get_or_load("BTC", load)
+    )
+    assert first is second
+    assert len(loads) == 1
+
+    await namespace.invalidate("BTC")
+    pending = asyncio.ensure_future(namespace.get_or_load("BTC", load))
+    await asyncio.sleep(0)
+    # updated while the old value was being read
+    await namespace.invalidate("BTC")
+
+    assert (await pending).name == "Bitcoin 2"
+    assert await namespace.get("BTC") is None
+
+
+@pytest.mark.asyncio
+async def test_callers_after_an_invalidation_start_a_new_load():
+    namespace = TieredCache().namespace(
+        "currencies", ttl=60, maxsize=10, codec=model_codec(CurrencyInfo)
+    )
+    names = iter(["Bitcoin", "Bitcoin Updated"])
+
+    async def load():
+        name = next(names)
+        await asyncio.sleep(0.01)
+        return CurrencyInfo(symbol="BTC", name=name)
+
+    stale = asyncio.ensure_future(namespace.get_or_load("BTC", load))
+    await asyncio.sleep(0)
+    await namespace.invalidate("BTC")
+    fresh = await namespace.get_or_load("BTC", load)
+
+    assert (await stale).name == "Bitcoin"
+    assert fresh.name == "Bitcoin Updated"
+    assert (await namespace.get("BTC")).name == "Bitcoin Updated"
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_loads_in_flight():
+    cache = TieredCache()
+    namespace = cache.namespace(
+        "currencies", ttl=60, maxsize=10, codec=model_codec(CurrencyInfo)
+    )
+    pending = asyncio.ensure_future(
+        namespace.get_or_load("BTC", asyncio.Event().wait)
+    )
+    await asyncio.sleep(0)
+
+    await cache.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await pending